@@ -112,14 +112,18 @@ function(add_lq_application TARGET_NAME)
 
     # Stage 1: EDS expansion (if EDS file provided)
     if(APP_EDS)
+        # dts_gen.py leaves unchanged files untouched, so the rule's OUTPUT is a
+        # stamp and the generated files are byproducts.
         add_custom_command(
-            OUTPUT ${GEN_DIR}/expanded.dts
-                   ${GEN_DIR}/motor_signals.h
+            OUTPUT ${GEN_DIR}/.eds.stamp
+            BYPRODUCTS ${GEN_DIR}/expanded.dts
+                       ${GEN_DIR}/motor_signals.h
             COMMAND ${SCRIPT_DIR}/dts_gen.py
                 ${DTS_FILE}
                 ${GEN_DIR}
                 --expand-eds
                 --signals-header ${GEN_DIR}/motor_signals.h
+            COMMAND ${CMAKE_COMMAND} -E touch ${GEN_DIR}/.eds.stamp
             DEPENDS ${SCRIPT_DIR}/dts_gen.py
                     ${DTS_FILE}
                     ${EDS_FILE}
@@ -127,10 +131,12 @@ function(add_lq_application TARGET_NAME)
         )
         set(PARSED_DTS "${GEN_DIR}/expanded.dts")
         set(SIGNAL_HEADER "${GEN_DIR}/motor_signals.h")
+        set(EDS_STAMP "${GEN_DIR}/.eds.stamp")
     else()
         # No EDS expansion needed
         set(PARSED_DTS "${DTS_FILE}")
         set(SIGNAL_HEADER "")
+        set(EDS_STAMP "")
     endif()
 
     # Stage 2: Generate lq_generated.c/h and main.c from DTS
@@ -149,8 +155,7 @@ function(add_lq_application TARGET_NAME)
     if(SIGNAL_HEADER)
         set(GEN_DEPENDS
             ${SCRIPT_DIR}/dts_gen.py
-            ${PARSED_DTS}
-            ${SIGNAL_HEADER}
+            ${EDS_STAMP}
         )
     else()
         set(GEN_DEPENDS
@@ -159,19 +164,23 @@ function(add_lq_application TARGET_NAME)
         )
     endif()
 
+    set(GEN_STAMP ${GEN_DIR}/.codegen.stamp)
+
     add_custom_command(
-        OUTPUT ${GEN_OUTPUTS}
+        OUTPUT ${GEN_STAMP}
+        BYPRODUCTS ${GEN_OUTPUTS}
         COMMAND ${SCRIPT_DIR}/dts_gen.py
             ${PARSED_DTS}
             ${GEN_DIR}
             --platform=${APP_PLATFORM}
+        COMMAND ${CMAKE_COMMAND} -E touch ${GEN_STAMP}
         DEPENDS ${GEN_DEPENDS}
         COMMENT "Generating code from device tree for ${TARGET_NAME} (platform=${APP_PLATFORM}, rtos=${APP_RTOS})"
     )
 
     # Custom target to ensure generation happens
     add_custom_target(${TARGET_NAME}_codegen
-        DEPENDS ${GEN_OUTPUTS}
+        DEPENDS ${GEN_STAMP}
     )
 
     # Note: prj.conf is kept in build directory and referenced via CONF_FILE in CMakeLists.txt
@@ -274,7 +283,7 @@ function(add_lq_application TARGET_NAME)
             COMMAND ${SCRIPT_DIR}/hil_test_gen.py
                 ${HIL_DIR}/comprehensive_hil_tests.dts
                 ${HIL_DIR}
-            DEPENDS ${GEN_OUTPUTS}
+            DEPENDS ${GEN_STAMP}
                     ${SCRIPT_DIR}/generate_comprehensive_hil_tests.py
                     ${SCRIPT_DIR}/hil_test_gen.py
             COMMENT "Generating comprehensive HIL tests for ${TARGET_NAME}"
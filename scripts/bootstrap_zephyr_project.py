@@ -20,14 +20,24 @@ Notes:
 """
 
 import argparse
+import filecmp
+import hashlib
+import mmap
 import os
+import re
 import shutil
 import stat
+import string
 import subprocess
 import sys
 import tarfile
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from urllib.request import urlopen, Request
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlsplit
 
 
 ROOT = Path(__file__).resolve().parents[3]
@@ -35,97 +45,547 @@ VENV_DIR = ROOT / '.venv'
 SDK_DIR = ROOT / '.zephyr-sdk'
 SCRIPTS_DIR = ROOT / 'modules' / 'layered-queue-driver' / 'scripts'
 BUILD_DIR = ROOT / 'build'
+ZEPHYR_REQS = ROOT / 'zephyr' / 'scripts' / 'requirements.txt'
+CACHE_DIR = Path.home() / '.cache' / 'zephyr-bootstrap'
+# pip wheel used to seed the venv (created --without-pip)
+PIP_WHEEL_URL = 'https://files.pythonhosted.org/packages/py3/p/pip/pip-24.2-py3-none-any.whl'
+# Environment for every pip invocation: no version self-check, no prompts
+PIP_ENV = dict(os.environ, PIP_DISABLE_PIP_VERSION_CHECK='1', PIP_NO_INPUT='1',
+               PYTHONDONTWRITEBYTECODE='1')
+# Digest of the last requirements set installed into the venv
+REQS_STAMP = VENV_DIR / '.zephyr_reqs.sha256'
+# Packages installed into the venv before anything else
+BASE_PACKAGES = ['pip', 'setuptools', 'wheel', 'west']
+# Copy buffer for downloads; large blocks keep syscall count low for the SDK
+DOWNLOAD_CHUNK = 4 * 1024 * 1024
+# Zephyr SDK release published on GitHub (sdk-ng)
+SDK_VERSION_DEFAULT = '0.16.8'
+SDK_RELEASE_URL = 'https://github.com/zephyrproject-rtos/sdk-ng/releases/download/v{v}'
+SDK_URL_TEMPLATE = SDK_RELEASE_URL + '/zephyr-sdk-{v}-setup.run'
+# Line preceding the tar.xz payload inside the SDK .run installer. Matched
+# as a whole line: the installer's own shell header mentions it too.
+SDK_PAYLOAD_MARKER = b'\n__ARCHIVE_BEGINS_HERE__\n'
 # Default: write generated project files into build/ for predictable builds
 WRITE_TO_BUILD = True
 
+# Static build/ files are shipped as data in templates/ and copied as-is
+TEMPLATES_DIR = Path(__file__).resolve().parent / 'templates'
+PROJECT_TEMPLATES = [
+    ('CMakeLists.txt', TEMPLATES_DIR / 'CMakeLists.txt.tmpl'),
+    ('west.yml', TEMPLATES_DIR / 'west.yml.tmpl'),
+]
+ENV_TEMPLATE = string.Template(
+    'export ZEPHYR_SDK_INSTALL_DIR=${sdk_dir}\n'
+    'export ZEPHYR_BASE=${root}/zephyr\n'
+)
+
+
+_log_lock = threading.Lock()
+
+
+def log(*args):
+    # Stages run on worker threads; keep their lines from interleaving
+    with _log_lock:
+        print(*args, flush=True)
+
 
-def run(cmd, **kwargs):
-    print(f">>> {' '.join(cmd)}")
+def run(cmd, block=True, **kwargs):
+    # With block=False the child is started and its Popen returned; pass
+    # it to wait() once the caller has overlapped whatever it needed to.
+    log(f">>> {' '.join(cmd)}")
+    # Python fds are non-inheritable by default (PEP 446), so close_fds
+    # buys nothing here; leaving it off lets subprocess use posix_spawn
+    # instead of fork()ing this process.
+    kwargs.setdefault('close_fds', False)
+    if not block:
+        return subprocess.Popen(cmd, **kwargs)
     subprocess.check_call(cmd, **kwargs)
 
 
+def wait(proc):
+    returncode = proc.wait()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, proc.args)
+
+
 def ensure_venv(python_exe=None):
     if VENV_DIR.exists():
-        print(f"Using existing venv: {VENV_DIR}")
+        log(f"Using existing venv: {VENV_DIR}")
+        if not (VENV_DIR / 'bin' / 'pip').exists():
+            bootstrap_pip()
         return
 
-    py = python_exe or shutil.which('python3') or shutil.which('python')
+    # The running interpreter is the obvious choice; only search PATH when
+    # sys.executable is unusable (e.g. embedded or frozen builds).
+    py = python_exe
+    if not py and sys.executable and Path(sys.executable).exists():
+        py = sys.executable
+    if not py:
+        py = shutil.which('python3') or shutil.which('python')
     if not py:
         raise SystemExit('No Python interpreter found (python3 or python).')
 
-    print(f"Creating virtualenv at {VENV_DIR} using {py}")
-    run([py, '-m', 'venv', str(VENV_DIR)])
+    # ensurepip unpacks and installs its bundled pip, only for pip_install()
+    # to upgrade it straight away; install the pinned wheel directly instead.
+    log(f"Creating virtualenv at {VENV_DIR} using {py}")
+    run([py, '-m', 'venv', '--without-pip', str(VENV_DIR)])
+    bootstrap_pip()
 
 
-def pip_install(packages):
-    pip = VENV_DIR / 'bin' / 'pip'
-    run([str(pip), 'install', '--upgrade', 'pip', 'setuptools', 'wheel'])
-    run([str(pip), 'install'] + packages)
-
+def bootstrap_pip():
+    venv_py = str(VENV_DIR / 'bin' / 'python')
+    wheel = CACHE_DIR / PIP_WHEEL_URL.rsplit('/', 1)[1]
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        download_file(PIP_WHEEL_URL, wheel)
+        # A pip wheel is runnable as-is and can install itself
+        run([venv_py, f'{wheel}/pip', 'install', '--no-index', '--no-compile', str(wheel)])
+    except Exception as e:
+        log(f'Warning: installing pip from {wheel.name} failed ({e}); falling back to ensurepip')
+        run([venv_py, '-m', 'ensurepip'])
+
+
+def installed_pip_version():
+    # Read from the dist-info name; cheaper than running `pip --version`
+    dists = sorted(VENV_DIR.glob('lib/python*/site-packages/pip-*.dist-info'))
+    return dists[-1].name if dists else ''
+
+
+def requirements_digest(req_file: Path) -> str:
+    """Hash a requirements file, the files it includes, and the pip version."""
+    h = hashlib.sha256(installed_pip_version().encode())
+    pending, seen = [req_file], set()
+    while pending:
+        path = pending.pop()
+        if path in seen or not path.exists():
+            continue
+        seen.add(path)
+        data = path.read_bytes()
+        h.update(data)
+        for line in data.decode(errors='replace').splitlines():
+            fields = line.split()
+            if len(fields) >= 2 and fields[0] in ('-r', '--requirement', '-c', '--constraint'):
+                pending.append(path.parent / fields[1])
+    return h.hexdigest()
+
+
+def prefetch_requirement_groups(req_file: Path):
+    """Download the requirements-*.txt groups next to req_file concurrently.
+
+    Installing the groups concurrently would have several pip processes
+    writing into the same site-packages. Instead they are only downloaded
+    in parallel, which fills pip's shared HTTP cache. The single
+    `pip install -r` that follows then resolves and installs everything
+    from that cache, with no network waits.
+    """
+    groups = sorted(req_file.parent.glob('requirements-*.txt'))
+    if len(groups) < 2:
+        return
+    pip = str(VENV_DIR / 'bin' / 'pip')
+    log(f'Prefetching {len(groups)} requirement groups in parallel')
+    with tempfile.TemporaryDirectory() as tmp:
+        # Plain child processes; no threads needed to wait on them
+        procs = [
+            run([pip, 'download', '--quiet', '--prefer-binary',
+                 '-d', str(Path(tmp) / group.stem), '-r', str(group)],
+                block=False, env=PIP_ENV)
+            for group in groups
+        ]
+        for proc in procs:
+            try:
+                wait(proc)
+            except subprocess.CalledProcessError as e:
+                # The install below will retry and report any real problem
+                log(f'Warning: prefetch failed: {e}')
+
+
+def pip_install(packages, requirements=None):
+    if requirements is not None and REQS_STAMP.exists():
+        if REQS_STAMP.read_text().strip() == requirements_digest(requirements):
+            log(f'{requirements} unchanged since last install; skipping')
+            requirements = None
+    if not packages and requirements is None:
+        return
 
-def ensure_west_and_deps():
-    pip_install(['west'])
+    # The venv only serves the build, so skip .pyc generation at install
+    # time and take wheels over sdists when both exist.
+    pip = VENV_DIR / 'bin' / 'pip'
+    cmd = [str(pip), 'install', '--no-compile', '--prefer-binary']
+    # --upgrade is for the explicit tool packages only; packages already
+    # satisfying the requirements file's ranges are left as they are
+    if packages:
+        run(cmd + ['--upgrade'] + list(packages), env=PIP_ENV)
+    if requirements is not None:
+        prefetch_requirement_groups(requirements)
+        run(cmd + ['-r', str(requirements)], env=PIP_ENV)
+        REQS_STAMP.write_text(requirements_digest(requirements))
 
 
 def west_init_update():
     west = VENV_DIR / 'bin' / 'west'
     # If ZEPHYR_BASE is set, assume user has a Zephyr checkout and skip init/update
     if os.environ.get('ZEPHYR_BASE'):
-        print(f"ZEPHYR_BASE is set to {os.environ.get('ZEPHYR_BASE')}; skipping west init/update")
+        log(f"ZEPHYR_BASE is set to {os.environ.get('ZEPHYR_BASE')}; skipping west init/update")
         return
 
     if not (ROOT / '.west').exists():
-        print('Initializing west workspace (manifest will be fetched from upstream)')
+        log('Initializing west workspace (manifest will be fetched from upstream)')
         try:
             run([str(west), 'init', '-m', 'https://github.com/zephyrproject-rtos/manifest.git', str(ROOT)])
         except subprocess.CalledProcessError as e:
-            print(f'Warning: west init failed: {e}; continuing (workspace may be managed elsewhere)')
+            log(f'Warning: west init failed: {e}; continuing (workspace may be managed elsewhere)')
     else:
-        print('west workspace already initialized')
-    print('Updating west workspace (this may download Zephyr and modules)')
+        log('west workspace already initialized')
+    try:
+        clone_missing_projects(west)
+    except Exception as e:
+        log(f'Warning: parallel clone skipped ({e}); falling back to west update')
+    log('Updating west workspace (this may download Zephyr and modules)')
     try:
         run([str(west), 'update'], cwd=str(ROOT))
     except subprocess.CalledProcessError as e:
-        print(f'Warning: west update failed: {e}; continuing')
+        log(f'Warning: west update failed: {e}; continuing')
+
+
+def clone_project(url, revision, path):
+    # Shallow partial clones: only the checked-out tree is transferred
+    try:
+        if re.fullmatch(r'[0-9a-f]{40}', revision):
+            # `clone -b` only takes branches/tags; fetch pinned SHAs directly
+            run(['git', 'init', '-q', str(path)])
+            run(['git', '-C', str(path), 'fetch', '-q', '--depth=1', '--filter=blob:none', url, revision])
+            run(['git', '-C', str(path), 'checkout', '-q', 'FETCH_HEAD'])
+        else:
+            run(['git', 'clone', '-q', '--depth=1', '--filter=blob:none', '-b', revision, url, str(path)])
+    except BaseException:
+        # A half-made checkout would count as present on the next run and
+        # be skipped; remove it so `west update` or a rerun fetches it
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+
+
+def clone_missing_projects(west):
+    """Clone manifest projects that are not on disk yet, in parallel.
+
+    `west update` fetches projects one after another; on a fresh workspace
+    the clones are independent, so they are done concurrently here and the
+    following `west update` only has to record its manifest-rev refs.
+    `west list` only reports active projects, so inactive groups such as
+    optional and babblesim stay skipped, as they are in `west update`.
+    """
+    listing = subprocess.check_output(
+        [str(west), 'list', '-f', '{url} {revision} {abspath}'], cwd=str(ROOT), text=True)
+
+    missing = []
+    for line in listing.splitlines():
+        fields = line.split(' ', 2)
+        if len(fields) != 3:
+            continue
+        url, revision, path = fields
+        # The manifest repository itself is always present and is skipped here
+        if not Path(path).exists():
+            missing.append((url, revision, Path(path)))
+    if not missing:
+        return
+
+    log(f'Cloning {len(missing)} west projects in parallel')
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+        for future in [pool.submit(clone_project, *args) for args in missing]:
+            future.result()
 
 
 def install_zephyr_python_reqs():
     # Install zephyr's python requirements into the venv
-    req_file = ROOT / 'zephyr' / 'scripts' / 'requirements.txt'
-    if not req_file.exists():
-        print('Zephyr sources not found; skipping Zephyr Python requirements install')
+    if not ZEPHYR_REQS.exists():
+        log('Zephyr sources not found; skipping Zephyr Python requirements install')
         return
-    pip = VENV_DIR / 'bin' / 'pip'
-    print(f'Installing Zephyr Python requirements from {req_file}')
-    run([str(pip), 'install', '-r', str(req_file)])
+    log(f'Installing Zephyr Python requirements from {ZEPHYR_REQS}')
+    pip_install([], ZEPHYR_REQS)
+
+
+def prepare_workspace():
+    # west must be in the venv before `west init` can run. When Zephyr is
+    # already checked out, install its requirements right after it;
+    # otherwise they can only be installed once `west update` fetched them.
+    reqs_ready = ZEPHYR_REQS.exists()
+    pip_install(BASE_PACKAGES, ZEPHYR_REQS if reqs_ready else None)
+    west_init_update()
+    if not reqs_ready:
+        install_zephyr_python_reqs()
+
+
+# Keep-alive connections per (scheme, host), one set per thread
+_http = threading.local()
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+
+def drop_connections():
+    # After a failed or abandoned transfer a connection may hold unread data
+    for conn in getattr(_http, 'conns', {}).values():
+        conn.close()
+    _http.conns = {}
+
+
+def http_request(url: str, headers: dict, method: str = 'GET', max_redirects: int = 5):
+    """Issue a request over a reused keep-alive connection.
+
+    Downloads hit the same few hosts (GitHub, its release CDN, PyPI), so
+    connections are cached per host and the TLS handshake is only paid
+    once. Redirects are followed. Callers must read the response to EOF
+    (or call drop_connections()) before the next request on this thread.
+    Error statuses raise HTTPError, except 304 and 416 which are returned.
+    """
+    if not hasattr(_http, 'conns'):
+        _http.conns = {}
+    for _ in range(max_redirects + 1):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+        for attempt in range(2):
+            conn = _http.conns.get(key)
+            if conn is None:
+                cls = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+                conn = _http.conns[key] = cls(parts.netloc, timeout=60)
+            try:
+                conn.request(method, target, headers=headers)
+                resp = conn.getresponse()
+                break
+            except (ConnectionError, HTTPException):
+                # The server may have closed an idle keep-alive connection
+                conn.close()
+                del _http.conns[key]
+                if attempt:
+                    raise
+        if resp.status in REDIRECT_CODES:
+            resp.read()
+            url = urljoin(url, resp.headers['Location'])
+            continue
+        if resp.status >= 400 and resp.status != 416:
+            resp.read()
+            raise HTTPError(url, resp.status, resp.reason, resp.headers, None)
+        return resp
+    raise HTTPError(url, resp.status, 'too many redirects', resp.headers, None)
 
 
 def download_file(url: str, dest: Path):
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    print(f'Downloading {url} → {dest}')
-    req = Request(url, headers={'User-Agent': 'bootstrap-script/1.0'})
-    with urlopen(req) as resp, open(dest, 'wb') as out:
-        shutil.copyfileobj(resp, out)
+    """Download url to dest, skipping the transfer if dest is current.
+
+    The ETag and Last-Modified of each completed download are kept in
+    sidecar files next to dest and sent back as validators, so an unchanged
+    upstream answers 304 and nothing is transferred. Data is streamed into
+    `<dest>.part`; if a previous transfer was interrupted, it is resumed
+    with a Range request instead of starting over. Returns True if dest
+    was (re)written, False if the cached copy was reused.
+    """
+    part = dest.with_name(dest.name + '.part')
+    etag_file = dest.with_name(dest.name + '.etag')
+    modified_file = dest.with_name(dest.name + '.last-modified')
+    headers = {
+        'User-Agent': 'bootstrap-script/1.0',
+        'Accept-Encoding': 'identity',
+    }
+    offset = part.stat().st_size if part.exists() else 0
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+    elif dest.exists():
+        if etag_file.exists():
+            headers['If-None-Match'] = etag_file.read_text().strip()
+        if modified_file.exists():
+            headers['If-Modified-Since'] = modified_file.read_text().strip()
+
+    log(f'Downloading {url} → {dest}' + (f' (resuming at {offset} bytes)' if offset else ''))
+    resp = http_request(url, headers)
+    if resp.status == 304:
+        resp.read()
+        log(f'{dest.name} is up to date; skipping download')
+        return False
+    if resp.status == 416:
+        # Range not satisfiable: the partial file is unusable
+        resp.read()
+        part.unlink()
+        return download_file(url, dest)
+
+    # A server that ignores Range answers 200 with the full body
+    mode = 'ab' if resp.status == 206 else 'wb'
+    try:
+        with open(part, mode) as out:
+            shutil.copyfileobj(resp, out, DOWNLOAD_CHUNK)
+    except BaseException:
+        drop_connections()
+        raise
+    part.replace(dest)
+
+    # Only record validators once the body is complete on disk
+    for sidecar, value in ((etag_file, resp.headers.get('ETag')),
+                           (modified_file, resp.headers.get('Last-Modified'))):
+        if value:
+            sidecar.write_text(value)
+        elif sidecar.exists():
+            sidecar.unlink()
+    return True
+
+
+def sha256_file(path: Path) -> str:
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK), b''):
+            h.update(chunk)
+        return h.hexdigest()
+
+
+def fetch_sdk_checksum(version: str, filename: str):
+    # Each release publishes sha256.sum with "<digest>  <file>" lines
+    url = SDK_RELEASE_URL.format(v=version) + '/sha256.sum'
+    resp = http_request(url, {'User-Agent': 'bootstrap-script/1.0'})
+    if resp.status != 200:
+        resp.read()
+        return None
+    for line in resp.read().decode().splitlines():
+        fields = line.split()
+        if len(fields) == 2 and fields[1].lstrip('*') == filename:
+            return fields[0].lower()
+    return None
+
+
+def verify_sdk_installer(version: str, runfile: Path) -> bool:
+    # A sentinel holding the verified digest lets repeat runs skip hashing
+    ok_file = runfile.with_name(runfile.name + '.sha256.ok')
+    try:
+        expected = fetch_sdk_checksum(version, runfile.name)
+    except Exception as e:
+        log(f'Warning: could not fetch SDK checksums ({e}); skipping verification')
+        return True
+    if expected is None:
+        log(f'Warning: no published checksum for {runfile.name}; skipping verification')
+        return True
+    if ok_file.exists() and ok_file.read_text().strip() == expected:
+        return True
+
+    log(f'Verifying {runfile.name}')
+    if sha256_file(runfile) != expected:
+        return False
+    ok_file.write_text(expected)
+    return True
+
+
+def find_payload_offset(runfile: Path):
+    # Self-extracting installers append the tar.xz after a marker line
+    with open(runfile, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = mm.find(SDK_PAYLOAD_MARKER)
+        if pos < 0:
+            return None
+        return pos + len(SDK_PAYLOAD_MARKER)
+
+
+def extract_tar(tar: tarfile.TarFile, dest: Path):
+    # The 'data' filter (3.12, backported to 3.8.17+) rejects members that
+    # escape dest; a rejected member raises and the installer path is used.
+    if hasattr(tarfile, 'data_filter'):
+        tar.extractall(dest, filter='data')
+    else:
+        tar.extractall(dest)
+
+
+def extract_sdk_payload(runfile: Path, dest: Path) -> bool:
+    """Unpack the installer's tar.xz payload straight into dest.
 
+    Skips the shell self-extractor, which decompresses single-threaded.
+    If `xz` is on PATH it decompresses with one thread per core; otherwise
+    Python's lzma module is used. Members are written in DOWNLOAD_CHUNK
+    blocks rather than tarfile's 16 KiB default, so large toolchain
+    binaries land in a handful of write() calls. Returns False if the installer has no
+    recognisable payload, so the caller can run it the usual way.
+    """
+    offset = find_payload_offset(runfile)
+    if offset is None:
+        return False
+
+    log(f'Extracting SDK payload from {runfile.name} into {dest}')
+    with open(runfile, 'rb') as f:
+        f.seek(offset)
+        xz = shutil.which('xz')
+        if not xz:
+            with tarfile.open(fileobj=f, mode='r|xz', copybufsize=DOWNLOAD_CHUNK) as tar:
+                extract_tar(tar, dest)
+            return True
+        # The child inherits the fd, and with it the seek position
+        proc = subprocess.Popen([xz, '-d', '-c', '-T0'], stdin=f, stdout=subprocess.PIPE)
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode='r|', copybufsize=DOWNLOAD_CHUNK) as tar:
+                extract_tar(tar, dest)
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, proc.args)
+    return True
+
+
+def run_sdk_setup(sdk_dir: Path) -> bool:
+    """Run the unpacked SDK's setup.sh: host tools and CMake package registration.
+
+    The shell installer does this itself; after a direct payload extraction
+    it has to be done here. Returns False if it could not be run.
+    """
+    # The payload may unpack into sdk_dir itself or a zephyr-sdk-<version>/ below it
+    candidates = [sdk_dir / 'setup.sh', *sorted(sdk_dir.glob('*/setup.sh'))]
+    setup = next((path for path in candidates if path.is_file()), None)
+    if setup is None:
+        log(f'Warning: no setup.sh found under {sdk_dir}')
+        return False
+    try:
+        run(['/bin/bash', str(setup), '-h', '-c'], cwd=str(setup.parent))
+    except (OSError, subprocess.CalledProcessError) as e:
+        log(f'Warning: SDK setup failed ({e})')
+        return False
+    return True
 
-def download_and_install_sdk(version: str = '0.16.8'):
+
+def download_and_install_sdk(version: str = SDK_VERSION_DEFAULT):
     # Attempt to download SDK installer for linux x86_64
-    # URL pattern (GitHub releases): sdk-ng/releases/download/v{version}/zephyr-sdk-{version}-setup.run
-    runfile = ROOT / 'build' / f'zephyr-sdk-{version}-setup.run'
-    url = f'https://github.com/zephyrproject-rtos/sdk-ng/releases/download/v{version}/zephyr-sdk-{version}-setup.run'
+    runfile = BUILD_DIR / f'zephyr-sdk-{version}-setup.run'
+    url = SDK_URL_TEMPLATE.format(v=version)
+    ok_file = runfile.with_name(runfile.name + '.sha256.ok')
     try:
-        download_file(url, runfile)
+        if download_file(url, runfile):
+            ok_file.unlink(missing_ok=True)
+        if not verify_sdk_installer(version, runfile):
+            # Drop the corrupt copy and its validators so the retry is a full GET
+            log(f'Checksum mismatch for {runfile.name}; downloading again')
+            for stale in (runfile.with_name(runfile.name + '.etag'),
+                          runfile.with_name(runfile.name + '.last-modified')):
+                stale.unlink(missing_ok=True)
+            runfile.unlink()
+            download_file(url, runfile)
+            if not verify_sdk_installer(version, runfile):
+                log(f'SDK installer {runfile} failed checksum verification')
+                return False
     except Exception as e:
-        print(f'Failed to download SDK installer: {e}')
+        log(f'Failed to download SDK installer: {e}')
         return False
 
+    # Attempt non-interactive install into SDK_DIR
+    SDK_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        if extract_sdk_payload(runfile, SDK_DIR):
+            log(f'Zephyr SDK installed into {SDK_DIR}')
+            if not run_sdk_setup(SDK_DIR):
+                log('The SDK CMake package is not registered; builds need '
+                    'ZEPHYR_SDK_INSTALL_DIR from .zephyr_env to find it')
+            return True
+    except (OSError, tarfile.TarError, subprocess.CalledProcessError) as e:
+        log(f'Warning: direct SDK extraction failed ({e}); falling back to the installer')
+
     # Make executable
     runfile.chmod(runfile.stat().st_mode | stat.S_IXUSR)
 
-    # Attempt non-interactive install into SDK_DIR
-    SDK_DIR.mkdir(parents=True, exist_ok=True)
     installer = str(runfile)
-    print(f'Attempting to run SDK installer into {SDK_DIR} (may require sudo)')
+    log(f'Attempting to run SDK installer into {SDK_DIR} (may require sudo)')
     try:
         # Many Zephyr SDK installers accept a "-- -d <dir> -y" style to pass
         # options to the inner installer. Try a couple of common forms.
@@ -136,105 +596,87 @@ def download_and_install_sdk(version: str = '0.16.8'):
             cmd = [installer, '-d', str(SDK_DIR), '-y']
             run(cmd)
         except subprocess.CalledProcessError as e:
-            print('Automatic SDK installation failed; please run the installer manually:')
-            print(f'  {installer} -d {SDK_DIR} -y')
+            log('Automatic SDK installation failed; please run the installer manually:')
+            log(f'  {installer} -d {SDK_DIR} -y')
             return False
 
-    print(f'Zephyr SDK installed into {SDK_DIR}')
+    log(f'Zephyr SDK installed into {SDK_DIR}')
     return True
 
 
-def write_env_file():
-    
-    if WRITE_TO_BUILD:
-        BUILD_ENV = BUILD_DIR / '.zephyr_env'
-        BUILD_DIR.mkdir(parents=True, exist_ok=True)
-        with open(BUILD_ENV, 'w') as f:
-            f.write(f'export ZEPHYR_SDK_INSTALL_DIR={SDK_DIR}\n')
-            f.write(f'export ZEPHYR_BASE={ROOT}/zephyr\n')
-        print(f'Also wrote environment snippet to {BUILD_ENV}')
-
-
-def generate_cmakelists():
-    content = f'''# Auto-generated CMakeLists.txt by bootstrap_zephyr_project.py
-cmake_minimum_required(VERSION 3.20.0)
-project(zephy_app)
-
-option(ENABLE_HIL_TESTS "Build native HIL tests with Google Test" ON)
+def env_file_content():
+    return ENV_TEMPLATE.substitute(sdk_dir=SDK_DIR, root=ROOT)
 
-# Register layered-queue-driver as a Zephyr module BEFORE find_package(Zephyr)
-list(APPEND ZEPHYR_EXTRA_MODULES ${{CMAKE_CURRENT_SOURCE_DIR}}/modules/layered-queue-driver)
 
-# Use generated prj.conf from prereq directory when present
-set(CONF_FILE ${{CMAKE_CURRENT_BINARY_DIR}}/prereq/prj.conf)
-
-find_package(Zephyr REQUIRED HINTS $ENV{{ZEPHYR_BASE}})
-project(zephy_app)
+def write_if_changed(path: Path, content: str) -> bool:
+    # Leave unchanged files alone so their mtimes don't trigger rebuilds
+    data = content.encode()
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    path.write_bytes(data)
+    return True
 
-include(modules/layered-queue-driver/cmake/LayeredQueueApp.cmake)
-include(modules/layered-queue-driver/cmake/RequirementsDriven.cmake)
 
-add_lq_application_from_requirements(app
-    REQUIREMENTS requirements/
-    PLATFORM zephyr
-    RTOS zephyr
-)
-'''
-    # Optionally write to build directory
-    if WRITE_TO_BUILD:
-        BUILD_DIR.mkdir(parents=True, exist_ok=True)
-        build_cmake = BUILD_DIR / 'CMakeLists.txt'
-        build_cmake.write_text(content)
-        print(f'Also wrote CMakeLists.txt to {build_cmake}')
-
-
-def generate_west_yml():
-    content = '''manifest:
-  remotes:
-    - name: zephyr
-      url-base: https://github.com/zephyrproject-rtos
-  projects:
-    - name: zephyr
-      remote: zephyr
-      revision: main
-'''
-    # Optionally write to build directory
-    if WRITE_TO_BUILD:
-        BUILD_DIR.mkdir(parents=True, exist_ok=True)
-        build_west = BUILD_DIR / 'west.yml'
-        build_west.write_text(content)
-        print(f'Also wrote west.yml to {build_west}')
+def copy_if_changed(src: Path, dest: Path) -> bool:
+    # shutil.copyfile uses the kernel's in-place copy (sendfile) on Linux
+    if dest.exists() and filecmp.cmp(src, dest, shallow=False):
+        return False
+    shutil.copyfile(src, dest)
+    return True
 
 
 def generate_project_files():
     # Generate minimal project scaffolding if missing
-    generate_cmakelists()
-    generate_west_yml()
+    if not WRITE_TO_BUILD:
+        return
+    for name, template in PROJECT_TEMPLATES:
+        path = BUILD_DIR / name
+        if copy_if_changed(template, path):
+            log(f'Also wrote {name} to {path}')
+        else:
+            log(f'{path} is up to date')
+    env_file = BUILD_DIR / '.zephyr_env'
+    if write_if_changed(env_file, env_file_content()):
+        log(f'Also wrote environment snippet to {env_file}')
+    else:
+        log(f'{env_file} is up to date')
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--install-sdk', action='store_true', help='Download and attempt to install Zephyr SDK')
-    parser.add_argument('--sdk-version', default='0.16.8', help='Zephyr SDK version to download')
+    parser.add_argument('--sdk-version', default=SDK_VERSION_DEFAULT, help='Zephyr SDK version to download')
     parser.add_argument('--no-write-to-build', action='store_true', help="Don't write generated project files into build/ directory")
     args = parser.parse_args()
 
-    ensure_venv()
-    ensure_west_and_deps()
-    west_init_update()
-    install_zephyr_python_reqs()
-
     # Generate minimal top-level project files if they don't exist
     global WRITE_TO_BUILD
     if getattr(args, 'no_write_to_build', False):
         WRITE_TO_BUILD = False
-    generate_project_files()
 
-    if args.install_sdk:
-        ok = download_and_install_sdk(args.sdk_version)
-        if not ok:
-            print('SDK automatic install failed or incomplete. Please follow installer output.')
+    # Created once here; the generators and the SDK download assume it exists
+    if WRITE_TO_BUILD or args.install_sdk:
+        BUILD_DIR.mkdir(parents=True, exist_ok=True)
+
+    ensure_venv()
+
+    # The SDK download is independent of the Python/west setup, so the two
+    # network-bound stages overlap instead of running back to back.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        sdk = None
+        if args.install_sdk:
+            sdk = pool.submit(download_and_install_sdk, args.sdk_version)
+        workspace = pool.submit(prepare_workspace)
+
+        generate_project_files()
+
+        workspace.result()
+        if sdk is not None and not sdk.result():
+            log('SDK automatic install failed or incomplete. Please follow installer output.')
+
 
-    write_env_file()
 if __name__ == '__main__':
     main()
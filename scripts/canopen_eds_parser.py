@@ -58,14 +58,81 @@ Example output:
     };
 """
 
-import configparser
 import argparse
+import codecs
+import functools
+import io
+import itertools
+import os
+import re
 import sys
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
+
+# EDS files are INI-style: "[section]" headers followed by "Key=Value" lines
+_READ_BUFFER = 1 << 20
+_BOM = codecs.BOM_UTF8
+_WRITE_BUFFER = 1 << 16
+_SECTION_RE = re.compile(rb'\[([^\]\r\n]+)\]')
+_KV_RE = re.compile(rb'([^=;\s][^=]*?)\s*=\s*(.*?)\s*$')
+# Object sections: [1000], [0x1A00], [1018sub1], [0x1A00sub0x2]
+# (section names are lower-cased by the reader)
+_SECTION_CLASSIFY_RE = re.compile(r'(0x)?([0-9a-f]+)(?:\s*sub\s*(0x)?([0-9a-f]+))?')
+
+# Bit length per CANopen data type code (0x0001-0x001B); 0 = variable/unknown
+_TYPE_LEN = (
+    0,
+    1,   # 0x01 BOOLEAN
+    8,   # 0x02 INTEGER8
+    16,  # 0x03 INTEGER16
+    32,  # 0x04 INTEGER32
+    8,   # 0x05 UNSIGNED8
+    16,  # 0x06 UNSIGNED16
+    32,  # 0x07 UNSIGNED32
+    32,  # 0x08 REAL32
+    0,   # 0x09 VISIBLE_STRING
+    0,   # 0x0A OCTET_STRING
+    0,   # 0x0B UNICODE_STRING
+    0, 0, 0, 0,
+    64,  # 0x10 INTEGER64
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    64,  # 0x1B UNSIGNED64
+)
+
+# sanitize_name(): ASCII letters/digits upper-cased, ' ', '-' and '_' become '_'
+_SANITIZE_TABLE = str.maketrans({
+    chr(i): (chr(i).upper() if chr(i).isalnum() else '_' if chr(i) in ' -_' else None)
+    for i in range(128)
+})
+
+# PDO mapping descriptors: RPDO 0x1600-0x1603, TPDO 0x1A00-0x1A03
+_PDO_MAPPING_INDICES = frozenset(range(0x1600, 0x1604)) | frozenset(range(0x1A00, 0x1A04))
+# Objects parse_eds() always builds: communication profile + PDO mapping descriptors
+_INTERESTING = frozenset(range(0x1000, 0x1020)) | _PDO_MAPPING_INDICES
+
+# Signal ID allocation, see docs/canopen-eds-integration.md
+_RPDO_SIGNAL_BASE = 0
+_TPDO_SIGNAL_BASE = 100
+_SIGNALS_PER_PDO = 32
+
+# One PDO mapping entry in the generated device tree
+_MAPPING_BLOCK = (
+    "            /* %s */\n"
+    "            mapping@%d {\n"
+    "                index = <0x%04X>;\n"
+    "                subindex = <%d>;\n"
+    "                length = <%d>;\n"
+    "                signal-id = <%d>;  /* SIG_%s */\n"
+    "            };\n"
+    "\n"
+)
 
 class CANopenObject:
     """Represents a CANopen object dictionary entry"""
+    __slots__ = ('index', 'name', 'object_type', 'data_type', 'access_type',
+                 'pdo_mapping', 'default_value', 'subindices')
+    
     def __init__(self, index: int, name: str, obj_type: int):
         self.index = index
         self.name = name
@@ -78,6 +145,9 @@ class CANopenObject:
         
 class CANopenSubObject:
     """Represents a subindex of a CANopen object"""
+    __slots__ = ('subindex', 'name', 'data_type', 'access_type', 'pdo_mapping',
+                 'default_value', 'bit_length')
+    
     def __init__(self, subindex: int, name: str):
         self.subindex = subindex
         self.name = name
@@ -89,12 +159,15 @@ class CANopenSubObject:
 
 class PDOMapping:
     """Represents a PDO mapping entry"""
+    __slots__ = ('index', 'subindex', 'length', 'signal_id', 'name', 'signal_name')
+    
     def __init__(self, index: int, subindex: int, length: int):
         self.index = index
         self.subindex = subindex
         self.length = length  # in bits
         self.signal_id = None
         self.name = ""
+        self.signal_name = ""  # sanitized name, used as SIG_<signal_name>
 
 class CANopenDevice:
     """Complete CANopen device description from EDS/DCF"""
@@ -118,352 +191,404 @@ class CANopenDevice:
         self.tpdo_mappings: List[List[PDOMapping]] = [[], [], [], []]  # 4 TPDOs
         self.rpdo_mappings: List[List[PDOMapping]] = [[], [], [], []]  # 4 RPDOs
         
-def parse_eds(filepath: str) -> CANopenDevice:
-    """Parse an EDS/DCF file"""
-    device = CANopenDevice()
-    config = configparser.ConfigParser()
-    config.read(filepath)
-    
-    # Parse DeviceInfo
-    if 'DeviceInfo' in config:
-        dev_info = config['DeviceInfo']
-        device.vendor_name = dev_info.get('VendorName', '')
-        device.product_name = dev_info.get('ProductName', '')
-        device.vendor_id = int(dev_info.get('VendorNumber', '0'), 0)
-        device.product_code = int(dev_info.get('ProductNumber', '0'), 0)
-        device.revision = dev_info.get('RevisionNumber', '0')
-        device.order_code = dev_info.get('OrderCode', '')
-        
-    # Parse object dictionary
-    for section in config.sections():
-        # Object entry: [1000], [6040], [0x1A00], etc.
-        section_lower = section.lower()
-        
-        # Skip subindex sections in first pass - they'll be handled below
-        if 'sub' in section_lower:
-            continue
+def _iter_eds_entries(filepath: str) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """Stream (section, key, value) tuples from an INI-style EDS/DCF file
+    
+    Reads line by line through a 1 MiB buffer, so a multi-megabyte DCF
+    is never held in memory as a whole. Every section header yields
+    (section, None, None) first, so sections without any keys are still
+    reported. Section names and keys are ASCII; they are lower-cased once
+    here and decoded as latin-1. Values keep UTF-8 so non-ASCII parameter
+    names survive. Lines starting with ';' or '#' are comments.
+    """
+    match_section = _SECTION_RE.match
+    match_kv = _KV_RE.match
+    with open(filepath, 'rb', buffering=_READ_BUFFER) as f:
+        # A byte order mark can only precede the first line
+        first = f.readline()
+        if first.startswith(_BOM):
+            first = first[len(_BOM):]
         
-        # Check if this is a hex number (with or without 0x prefix)
-        try:
-            # Try parsing as hex with explicit prefix handling
-            if section_lower.startswith('0x'):
-                index = int(section, 16)
-            elif all(c in '0123456789abcdef' for c in section_lower) and len(section) <= 4:
-                # Plain hex number without 0x
-                index = int(section, 16)
-            else:
-                # Not a hex index, skip
+        section = None
+        for line in itertools.chain((first,), f):
+            line = line.strip()
+            if not line or line[:1] in b';#':
                 continue
-        except ValueError:
-            # Not a valid index
-            continue
-        
-        if index is not None:
-            obj_config = config[section]
-            
-            obj = CANopenObject(
-                index=index,
-                name=obj_config.get('ParameterName', f'Object_{index:04X}'),
-                obj_type=int(obj_config.get('ObjectType', '7'), 0)
-            )
-            obj.data_type = int(obj_config.get('DataType', '0'), 0)
-            obj.access_type = obj_config.get('AccessType', 'rw')
-            obj.pdo_mapping = obj_config.get('PDOMapping', '0') == '1'
-            obj.default_value = obj_config.get('DefaultValue')
-            
-            device.objects[index] = obj
+            if line[:1] == b'[':
+                match = match_section(line)
+                if match:
+                    section = match.group(1).strip().lower().decode('latin-1')
+                    yield section, None, None
+                continue
+            if section is None:
+                continue
+            match = match_kv(line)
+            if match:
+                yield (section,
+                       match.group(1).lower().decode('latin-1'),
+                       match.group(2).decode('utf-8', 'replace'))
+
+def _iter_eds_sections(filepath: str) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """Group streamed entries into (section, {key: value}), one section at a time"""
+    for section, entries in itertools.groupby(_iter_eds_entries(filepath), key=itemgetter(0)):
+        yield section, {key: value for _, key, value in entries if key is not None}
+
+@functools.lru_cache(maxsize=256)
+def _parse_type_code(text: str) -> int:
+    """Parse an ObjectType/DataType value such as '0x7' or '0x0007'
     
-    # Second pass - process subindex sections
-    for section in config.sections():
-        section_lower = section.lower()
-        
-        # Subindex entry: [1018sub1], [6040sub0], etc.
-        if 'sub' in section_lower:
-            parts = section_lower.split('sub')
-            if len(parts) == 2:
-                # Parse index (may or may not have 0x prefix)
-                idx_str = parts[0].strip()
-                if idx_str.startswith('0x'):
-                    index = int(idx_str, 16)
-                elif all(c in '0123456789abcdef' for c in idx_str):
-                    index = int(idx_str, 16)
-                else:
-                    continue
-                
-                # Parse subindex
-                sub_str = parts[1].strip()
-                if sub_str.startswith('0x'):
-                    subindex = int(sub_str, 16)
-                elif sub_str.isdigit():
-                    subindex = int(sub_str, 10)
-                elif all(c in '0123456789abcdef' for c in sub_str):
-                    subindex = int(sub_str, 16)
-                else:
-                    continue
-                
-                if index in device.objects:
-                    sub_config = config[section]
-                    sub = CANopenSubObject(
-                        subindex=subindex,
-                        name=sub_config.get('ParameterName', f'SubIndex_{subindex}')
-                    )
-                    sub.data_type = int(sub_config.get('DataType', '0'), 0)
-                    sub.access_type = sub_config.get('AccessType', 'rw')
-                    sub.pdo_mapping = sub_config.get('PDOMapping', '0') == '1'
-                    sub.bit_length = get_data_type_length(sub.data_type)
-                    sub.default_value = sub_config.get('DefaultValue')
-                    
-                    device.objects[index].subindices[subindex] = sub
-    
-    # Parse TPDO mappings (0x1A00-0x1A03)
-    for pdo_idx in range(4):
-        mapping_index = 0x1A00 + pdo_idx
-        if mapping_index in device.objects:
-            obj = device.objects[mapping_index]
+    Every section repeats one of a handful of these strings, so each
+    distinct spelling is converted once and then served from the cache.
+    """
+    return int(text, 0)
+
+def _classify_section(name: str) -> Tuple[Optional[int], Optional[int]]:
+    """Split a section name into (index, subindex)
+    
+    Object entries look like [1000], [6040] or [0x1A00]; subindex entries
+    like [1018sub1] or [0x1A00sub0x2]. Returns (index, None) for objects and
+    (None, None) for anything else ([DeviceInfo], [Comments], ...).
+    A subindex written only with digits is read as decimal, otherwise hex.
+    """
+    match = _SECTION_CLASSIFY_RE.fullmatch(name)
+    if not match:
+        return None, None
+    idx_prefix, idx_str, sub_prefix, sub_str = match.groups()
+    if sub_str is None:
+        # Bare indices are at most 4 hex digits; longer names aren't objects
+        if not idx_prefix and len(idx_str) > 4:
+            return None, None
+        return int(idx_str, 16), None
+    if sub_prefix or not sub_str.isdigit():
+        return int(idx_str, 16), int(sub_str, 16)
+    return int(idx_str, 16), int(sub_str, 10)
+
+def _make_object(index: int, obj_config: Dict[str, str]) -> CANopenObject:
+    """Build an object dictionary entry from its section keys"""
+    obj = CANopenObject(
+        index=index,
+        name=obj_config.get('parametername', f'Object_{index:04X}'),
+        obj_type=_parse_type_code(obj_config.get('objecttype', '7'))
+    )
+    obj.data_type = _parse_type_code(obj_config.get('datatype', '0'))
+    obj.access_type = obj_config.get('accesstype', 'rw')
+    obj.pdo_mapping = obj_config.get('pdomapping', '0') == '1'
+    obj.default_value = obj_config.get('defaultvalue')
+    return obj
+
+def _make_subobject(subindex: int, sub_config: Dict[str, str]) -> CANopenSubObject:
+    """Build a subindex entry from its section keys"""
+    sub = CANopenSubObject(
+        subindex=subindex,
+        name=sub_config.get('parametername', f'SubIndex_{subindex}')
+    )
+    data_type = sub.data_type = _parse_type_code(sub_config.get('datatype', '0'))
+    sub.bit_length = _TYPE_LEN[data_type] if 0 <= data_type < len(_TYPE_LEN) else 0
+    sub.access_type = sub_config.get('accesstype', 'rw')
+    sub.pdo_mapping = sub_config.get('pdomapping', '0') == '1'
+    sub.default_value = sub_config.get('defaultvalue')
+    return sub
+
+def _parse_map_default(text: str) -> int:
+    """Parse a PDO mapping DefaultValue (hex with a 0x prefix, else decimal)"""
+    text = text.strip()
+    return int(text, 16) if text.startswith(('0x', '0X')) else int(text)
+
+def _decode_map_values(map_values: List[int]) -> List[Tuple[int, int, int]]:
+    """Split packed PDO mapping values into (index, subindex, length) triples
+    
+    Format: 0xIIIISSLL (Index 16bit, Subindex 8bit, Length 8bit)
+    """
+    return [((v >> 16) & 0xFFFF, (v >> 8) & 0xFF, v & 0xFF) for v in map_values]
+
+def _iter_map_entries(objects: Dict[int, CANopenObject]):
+    """Yield (base index, PDO number, DefaultValue text) of every in-use mapping slot
+    
+    Only subindices 1..count are in use, count being subindex 0 (at most 8).
+    """
+    for base_index in (0x1A00, 0x1600):
+        for pdo_idx in range(4):
+            obj = objects.get(base_index + pdo_idx)
+            if obj is None:
+                continue
             num_mapped = 0
             
             # Subindex 0 contains number of mapped objects
             if 0 in obj.subindices:
                 default_val = obj.subindices[0].default_value
                 if default_val:
-                    num_mapped = int(default_val, 0) if isinstance(default_val, str) else int(default_val)
+                    num_mapped = _parse_map_default(default_val)
             
             # Subindices 1-8 contain mapped object references
             for map_idx in range(1, min(num_mapped + 1, 9)):
-                if map_idx in obj.subindices:
-                    default_val = obj.subindices[map_idx].default_value
-                    if default_val:
-                        map_value = int(default_val, 0) if isinstance(default_val, str) else int(default_val)
-                        if map_value:
-                            # Format: 0xIIIISSLL (Index 16bit, Subindex 8bit, Length 8bit)
-                            idx = (map_value >> 16) & 0xFFFF
-                            sub = (map_value >> 8) & 0xFF
-                            length = map_value & 0xFF
-                            
-                            mapping = PDOMapping(idx, sub, length)
-                            if idx in device.objects:
-                                mapping.name = device.objects[idx].name
-                                if sub in device.objects[idx].subindices:
-                                    mapping.name = device.objects[idx].subindices[sub].name
-                            
-                            device.tpdo_mappings[pdo_idx].append(mapping)
-    
-    # Parse RPDO mappings (0x1600-0x1603)
-    for pdo_idx in range(4):
-        mapping_index = 0x1600 + pdo_idx
-        if mapping_index in device.objects:
-            obj = device.objects[mapping_index]
-            num_mapped = 0
-            
-            if 0 in obj.subindices:
-                default_val = obj.subindices[0].default_value
+                if map_idx not in obj.subindices:
+                    continue
+                default_val = obj.subindices[map_idx].default_value
                 if default_val:
-                    num_mapped = int(default_val, 0) if isinstance(default_val, str) else int(default_val)
-            
-            for map_idx in range(1, min(num_mapped + 1, 9)):
-                if map_idx in obj.subindices:
-                    default_val = obj.subindices[map_idx].default_value
-                    if default_val:
-                        map_value = int(default_val, 0) if isinstance(default_val, str) else int(default_val)
-                        if map_value:
-                            idx = (map_value >> 16) & 0xFFFF
-                            sub = (map_value >> 8) & 0xFF
-                            length = map_value & 0xFF
-                            
-                            mapping = PDOMapping(idx, sub, length)
-                            if idx in device.objects:
-                                mapping.name = device.objects[idx].name
-                                if sub in device.objects[idx].subindices:
-                                    mapping.name = device.objects[idx].subindices[sub].name
-                            
-                            device.rpdo_mappings[pdo_idx].append(mapping)
+                    yield base_index, pdo_idx, default_val
+
+def _extract_pdo_mappings(device: CANopenDevice):
+    """Decode the TPDO (0x1A00-0x1A03) and RPDO (0x1600-0x1603) mapping objects"""
+    objects = device.objects
+    pdo_lists = {0x1A00: device.tpdo_mappings, 0x1600: device.rpdo_mappings}
+    # Collect the raw values of all eight PDOs first and decode them in one batch
+    targets = []
+    map_values = []
+    for base_index, pdo_idx, default_val in _iter_map_entries(objects):
+        map_value = _parse_map_default(default_val)
+        if map_value:
+            targets.append(pdo_lists[base_index][pdo_idx])
+            map_values.append(map_value)
+    
+    for out, (idx, sub, length) in zip(targets, _decode_map_values(map_values)):
+        mapping = PDOMapping(idx, sub, length)
+        if idx in objects:
+            mapping.name = objects[idx].name
+            if sub in objects[idx].subindices:
+                mapping.name = objects[idx].subindices[sub].name
+        
+        out.append(mapping)
+
+def _assign_ids_and_names(device: CANopenDevice):
+    """Give every PDO mapping its signal ID and C name, once
+    
+    RPDO signals (commands from master) get pdo_idx * 32 + mapping_idx,
+    TPDO signals (status to master) get 100 + pdo_idx * 32 + mapping_idx.
+    """
+    for base, prefix, pdos in ((_RPDO_SIGNAL_BASE, 'RPDO', device.rpdo_mappings),
+                               (_TPDO_SIGNAL_BASE, 'TPDO', device.tpdo_mappings)):
+        for pdo_idx, mappings in enumerate(pdos):
+            for map_idx, mapping in enumerate(mappings):
+                if not mapping.name:
+                    mapping.name = f"{prefix}{pdo_idx + 1}_Signal{map_idx}"
+                mapping.signal_id = base + pdo_idx * _SIGNALS_PER_PDO + map_idx
+                mapping.signal_name = sanitize_name(mapping.name)
+
+def _mapped_indices(objects: Dict[int, CANopenObject]) -> set:
+    """Object indices referenced by the in-use TPDO/RPDO mapping entries
+    
+    Values that do not parse are skipped here; _extract_pdo_mappings decides
+    what to do with them.
+    """
+    indices = set()
+    for _, _, default_val in _iter_map_entries(objects):
+        try:
+            indices.add((_parse_map_default(default_val) >> 16) & 0xFFFF)
+        except ValueError:
+            continue
+    return indices
+
+def parse_eds(filepath: str, full: bool = False) -> CANopenDevice:
+    """Parse an EDS/DCF file
+    
+    Unless full is set, only the objects code generation needs are built:
+    the communication profile area, the PDO mapping descriptors and
+    whatever those mappings reference (by name only). Pass full=True to
+    get the complete object dictionary.
+    """
+    device = CANopenDevice()
+    
+    # Sections are turned into objects as they stream past; only the
+    # current section's keys are held. Subindices normally follow their
+    # object, but any that arrive first are attached at the end.
+    pending_subs = []
+    # (index, subindex) -> ParameterName of sections skipped when not full
+    skipped = {}
+    for section, values in _iter_eds_sections(filepath):
+        if section == 'deviceinfo':
+            device.vendor_name = values.get('vendorname', '')
+            device.product_name = values.get('productname', '')
+            device.vendor_id = int(values.get('vendornumber', '0'), 0)
+            device.product_code = int(values.get('productnumber', '0'), 0)
+            device.revision = values.get('revisionnumber', '0')
+            device.order_code = values.get('ordercode', '')
+            continue
+        
+        index, subindex = _classify_section(section)
+        if index is None:
+            continue
+        if not full and index not in _INTERESTING:
+            skipped[(index, subindex)] = values.get('parametername')
+            continue
+        if subindex is None:
+            device.objects[index] = _make_object(index, values)
+        elif index in device.objects:
+            device.objects[index].subindices[subindex] = _make_subobject(subindex, values)
+        else:
+            pending_subs.append((index, subindex, values))
+    
+    for index, subindex, sub_config in pending_subs:
+        if index in device.objects:
+            device.objects[index].subindices[subindex] = _make_subobject(subindex, sub_config)
+    
+    # Bring back the skipped objects that a PDO mapping points at; objects
+    # before their subindices, as the mapping name prefers the latter
+    if skipped:
+        referenced = _mapped_indices(device.objects)
+        for (index, subindex), name in sorted(skipped.items(), key=lambda item: item[0][1] is not None):
+            if index not in referenced:
+                continue
+            values = {'parametername': name} if name is not None else {}
+            if subindex is None:
+                device.objects[index] = _make_object(index, values)
+            elif index in device.objects:
+                device.objects[index].subindices[subindex] = _make_subobject(subindex, values)
+    
+    _extract_pdo_mappings(device)
+    _assign_ids_and_names(device)
     
     return device
 
+@functools.lru_cache(maxsize=64)
+def _parse_eds_cached(path: str, mtime_ns: int, size: int, full: bool) -> CANopenDevice:
+    return parse_eds(path, full=full)
+
+def parse_eds_cached(filepath: str, full: bool = False) -> CANopenDevice:
+    """parse_eds(), memoized on the file's path, mtime and size
+    
+    The returned device is shared between callers and must not be modified.
+    """
+    path = os.path.abspath(filepath)
+    st = os.stat(path)
+    return _parse_eds_cached(path, st.st_mtime_ns, st.st_size, full)
+
 def get_data_type_length(data_type: int) -> int:
     """Get bit length for CANopen data type"""
-    type_lengths = {
-        0x0001: 1,   # BOOLEAN
-        0x0002: 8,   # INTEGER8
-        0x0003: 16,  # INTEGER16
-        0x0004: 32,  # INTEGER32
-        0x0005: 8,   # UNSIGNED8
-        0x0006: 16,  # UNSIGNED16
-        0x0007: 32,  # UNSIGNED32
-        0x0008: 32,  # REAL32
-        0x0009: 0,   # VISIBLE_STRING
-        0x000A: 0,   # OCTET_STRING
-        0x000B: 0,   # UNICODE_STRING
-        0x0010: 64,  # INTEGER64
-        0x001B: 64,  # UNSIGNED64
-    }
-    return type_lengths.get(data_type, 0)
+    return _TYPE_LEN[data_type] if 0 <= data_type < len(_TYPE_LEN) else 0
 
-def generate_device_tree(device: CANopenDevice, node_id: int, 
-                         node_name: str, output_file: Optional[str] = None) -> str:
-    """Generate Zephyr device tree overlay from CANopen device description"""
-    
-    lines = []
-    lines.append("/*")
-    lines.append(f" * CANopen Device Tree - Generated from EDS")
-    lines.append(f" * Device: {device.product_name}")
-    lines.append(f" * Vendor: {device.vendor_name}")
-    lines.append(f" * Node ID: {node_id}")
-    lines.append(" */")
-    lines.append("")
-    lines.append("/ {")
-    lines.append(f"    {node_name}: canopen-device@{node_id} {{")
-    lines.append(f'        compatible = "lq,protocol-canopen";')
-    lines.append(f"        node-id = <{node_id}>;")
-    lines.append(f'        label = "{device.product_name}";')
-    lines.append("")
+def _write_device_tree(w, device: CANopenDevice, node_id: int, node_name: str):
+    """Emit the device tree overlay through the write callable w"""
+    w("/*\n"
+      " * CANopen Device Tree - Generated from EDS\n"
+      f" * Device: {device.product_name}\n"
+      f" * Vendor: {device.vendor_name}\n"
+      f" * Node ID: {node_id}\n"
+      " */\n"
+      "\n"
+      "/ {\n"
+      f"    {node_name}: canopen-device@{node_id} {{\n"
+      '        compatible = "lq,protocol-canopen";\n'
+      f"        node-id = <{node_id}>;\n"
+      f'        label = "{device.product_name}";\n'
+      "\n")
     
     # Add device identity
     if device.vendor_id or device.product_code:
-        lines.append("        /* Device Identity (Object 0x1018) */")
+        w("        /* Device Identity (Object 0x1018) */\n")
         if device.vendor_id:
-            lines.append(f"        vendor-id = <0x{device.vendor_id:08X}>;")
+            w(f"        vendor-id = <0x{device.vendor_id:08X}>;\n")
         if device.product_code:
-            lines.append(f"        product-code = <0x{device.product_code:08X}>;")
-        lines.append("")
+            w(f"        product-code = <0x{device.product_code:08X}>;\n")
+        w("\n")
     
     # Generate TPDO configurations
-    signal_id = 100  # Start signal IDs at 100 for TPDO signals
     for pdo_idx in range(4):
         if device.tpdo_mappings[pdo_idx]:
-            lines.append(f"        /* TPDO{pdo_idx + 1} - Transmit data to master */")
-            lines.append(f"        tpdo{pdo_idx + 1}: tpdo@{pdo_idx} {{")
             cob_id = 0x180 + (pdo_idx * 0x100) + node_id
-            lines.append(f"            cob-id = <0x{cob_id:03X}>;")
-            lines.append(f"            transmission-type = <254>;  /* Event-driven */")
-            lines.append(f"            event-timer-ms = <1000>;")
-            lines.append("")
+            w(f"        /* TPDO{pdo_idx + 1} - Transmit data to master */\n"
+              f"        tpdo{pdo_idx + 1}: tpdo@{pdo_idx} {{\n"
+              f"            cob-id = <0x{cob_id:03X}>;\n"
+              "            transmission-type = <254>;  /* Event-driven */\n"
+              "            event-timer-ms = <1000>;\n"
+              "\n")
             
             for map_idx, mapping in enumerate(device.tpdo_mappings[pdo_idx]):
-                mapping.signal_id = signal_id
-                signal_id += 1
-                
-                lines.append(f"            /* {mapping.name} */")
-                lines.append(f"            mapping@{map_idx} {{")
-                lines.append(f"                index = <0x{mapping.index:04X}>;")
-                lines.append(f"                subindex = <{mapping.subindex}>;")
-                lines.append(f"                length = <{mapping.length}>;")
-                lines.append(f"                signal-id = <{mapping.signal_id}>;  /* SIG_{sanitize_name(mapping.name)} */")
-                lines.append(f"            }};")
-                lines.append("")
+                w(_MAPPING_BLOCK % (mapping.name, map_idx, mapping.index, mapping.subindex,
+                                    mapping.length, mapping.signal_id, mapping.signal_name))
             
-            lines.append(f"        }};")
-            lines.append("")
+            w("        };\n\n")
     
     # Generate RPDO configurations
-    signal_id = 0  # Start signal IDs at 0 for RPDO signals (commands from master)
     for pdo_idx in range(4):
         if device.rpdo_mappings[pdo_idx]:
-            lines.append(f"        /* RPDO{pdo_idx + 1} - Receive commands from master */")
-            lines.append(f"        rpdo{pdo_idx + 1}: rpdo@{pdo_idx} {{")
             cob_id = 0x200 + (pdo_idx * 0x100) + node_id
-            lines.append(f"            cob-id = <0x{cob_id:03X}>;")
-            lines.append("")
+            w(f"        /* RPDO{pdo_idx + 1} - Receive commands from master */\n"
+              f"        rpdo{pdo_idx + 1}: rpdo@{pdo_idx} {{\n"
+              f"            cob-id = <0x{cob_id:03X}>;\n"
+              "\n")
             
             for map_idx, mapping in enumerate(device.rpdo_mappings[pdo_idx]):
-                mapping.signal_id = signal_id
-                signal_id += 1
-                
-                lines.append(f"            /* {mapping.name} */")
-                lines.append(f"            mapping@{map_idx} {{")
-                lines.append(f"                index = <0x{mapping.index:04X}>;")
-                lines.append(f"                subindex = <{mapping.subindex}>;")
-                lines.append(f"                length = <{mapping.length}>;")
-                lines.append(f"                signal-id = <{mapping.signal_id}>;  /* SIG_{sanitize_name(mapping.name)} */")
-                lines.append(f"            }};")
-                lines.append("")
+                w(_MAPPING_BLOCK % (mapping.name, map_idx, mapping.index, mapping.subindex,
+                                    mapping.length, mapping.signal_id, mapping.signal_name))
             
-            lines.append(f"        }};")
-            lines.append("")
+            w("        };\n\n")
     
-    lines.append("    };")
-    lines.append("};")
-    lines.append("")
+    w("    };\n"
+      "};\n"
+      "\n")
     
     # Generate signal ID definitions header
-    lines.append("/*")
-    lines.append(" * Signal ID Definitions")
-    lines.append(" * Copy these to your application header file")
-    lines.append(" */")
-    lines.append("")
-    lines.append("/* RPDO Signals (Commands from master) */")
+    w("/*\n"
+      " * Signal ID Definitions\n"
+      " * Copy these to your application header file\n"
+      " */\n"
+      "\n"
+      "/* RPDO Signals (Commands from master) */\n")
     for pdo_idx in range(4):
         for mapping in device.rpdo_mappings[pdo_idx]:
-            sig_name = f"SIG_{sanitize_name(mapping.name)}"
-            lines.append(f"#define {sig_name:40} {mapping.signal_id:3}  /* RPDO{pdo_idx+1}: {mapping.name} */")
+            sig_name = f"SIG_{mapping.signal_name}"
+            w(f"#define {sig_name:40} {mapping.signal_id:3}  /* RPDO{pdo_idx+1}: {mapping.name} */\n")
     
-    lines.append("")
-    lines.append("/* TPDO Signals (Status to master) */")
+    w("\n"
+      "/* TPDO Signals (Status to master) */\n")
     for pdo_idx in range(4):
         for mapping in device.tpdo_mappings[pdo_idx]:
-            sig_name = f"SIG_{sanitize_name(mapping.name)}"
-            lines.append(f"#define {sig_name:40} {mapping.signal_id:3}  /* TPDO{pdo_idx+1}: {mapping.name} */")
-    
-    dts_content = '\n'.join(lines)
+            sig_name = f"SIG_{mapping.signal_name}"
+            w(f"#define {sig_name:40} {mapping.signal_id:3}  /* TPDO{pdo_idx+1}: {mapping.name} */\n")
+
+def generate_device_tree(device: CANopenDevice, node_id: int, 
+                         node_name: str, output_file: Optional[str] = None) -> Optional[str]:
+    """Generate Zephyr device tree overlay from CANopen device description
     
+    With output_file the overlay is streamed straight into the file and
+    None is returned; otherwise the overlay text is returned.
+    """
     if output_file:
-        with open(output_file, 'w') as f:
-            f.write(dts_content)
+        with open(output_file, 'w', buffering=_WRITE_BUFFER) as f:
+            _write_device_tree(f.write, device, node_id, node_name)
         print(f"Generated device tree: {output_file}")
+        return None
     
-    return dts_content
+    buf = io.StringIO()
+    _write_device_tree(buf.write, device, node_id, node_name)
+    return buf.getvalue()
 
 def generate_signal_header(device, output_file):
     """Generate C header file with signal ID definitions"""
-    lines = []
-    lines.append("/* Auto-generated CANopen signal IDs - DO NOT EDIT */")
-    lines.append(f"/* Generated from: {device.product_name} */")
-    lines.append("")
-    lines.append("#ifndef MOTOR_SIGNALS_H")
-    lines.append("#define MOTOR_SIGNALS_H")
-    lines.append("")
-    
-    # RPDO signals (commands from master)
-    if device.rpdo_mappings:
-        lines.append("/* RPDO Signals (Commands from master) */")
-        for pdo_num, mappings in enumerate(device.rpdo_mappings):
-            if mappings:
-                for i, mapping in enumerate(mappings):
-                    obj = device.objects.get(mapping.index)
-                    if obj:
-                        name = sanitize_name(obj.name)
-                        signal_id = pdo_num * 32 + i
-                        comment = f"RPDO{pdo_num + 1}: {obj.name}"
-                        lines.append(f"#define SIG_{name:40s} {signal_id:3d}  /* {comment} */")
-        lines.append("")
-    
-    # TPDO signals (status to master)
-    if device.tpdo_mappings:
-        lines.append("/* TPDO Signals (Status to master) */")
-        for pdo_num, mappings in enumerate(device.tpdo_mappings):
-            if mappings:
-                for i, mapping in enumerate(mappings):
-                    obj = device.objects.get(mapping.index)
-                    if obj:
-                        name = sanitize_name(obj.name)
-                        signal_id = 100 + pdo_num * 32 + i
-                        comment = f"TPDO{pdo_num + 1}: {obj.name}"
-                        lines.append(f"#define SIG_{name:40s} {signal_id:3d}  /* {comment} */")
-        lines.append("")
-    
-    lines.append("#endif /* MOTOR_SIGNALS_H */")
-    
-    with open(output_file, 'w') as f:
-        f.write('\n'.join(lines))
+    with open(output_file, 'w', buffering=_WRITE_BUFFER) as f:
+        w = f.write
+        w("/* Auto-generated CANopen signal IDs - DO NOT EDIT */\n"
+          f"/* Generated from: {device.product_name} */\n"
+          "\n"
+          "#ifndef MOTOR_SIGNALS_H\n"
+          "#define MOTOR_SIGNALS_H\n"
+          "\n")
+        
+        # RPDO signals (commands from master)
+        if device.rpdo_mappings:
+            w("/* RPDO Signals (Commands from master) */\n")
+            for pdo_num, mappings in enumerate(device.rpdo_mappings):
+                for mapping in mappings:
+                    comment = f"RPDO{pdo_num + 1}: {mapping.name}"
+                    w(f"#define SIG_{mapping.signal_name:40s} {mapping.signal_id:3d}  /* {comment} */\n")
+            w("\n")
+        
+        # TPDO signals (status to master)
+        if device.tpdo_mappings:
+            w("/* TPDO Signals (Status to master) */\n")
+            for pdo_num, mappings in enumerate(device.tpdo_mappings):
+                for mapping in mappings:
+                    comment = f"TPDO{pdo_num + 1}: {mapping.name}"
+                    w(f"#define SIG_{mapping.signal_name:40s} {mapping.signal_id:3d}  /* {comment} */\n")
+            w("\n")
+        
+        w("#endif /* MOTOR_SIGNALS_H */\n")
 
+@functools.lru_cache(maxsize=256)
 def sanitize_name(name: str) -> str:
     """Convert object name to valid C identifier"""
-    # Remove special characters, replace spaces with underscores
-    name = name.upper()
-    name = name.replace(' ', '_')
-    name = name.replace('-', '_')
-    name = ''.join(c if c.isalnum() or c == '_' else '' for c in name)
-    return name
+    # Upper-case, spaces/dashes become underscores, everything else is dropped
+    return name.encode('ascii', 'ignore').decode('ascii').translate(_SANITIZE_TABLE)
 
 def parse_eds_file(eds_path):
     """Helper function to parse EDS and return data for code generation
@@ -476,7 +601,7 @@ def parse_eds_file(eds_path):
     - tpdos: list of dicts with cob_id and mappings
     - rpdos: list of dicts with cob_id and mappings
     """
-    device = parse_eds(eds_path)
+    device = parse_eds_cached(eds_path)
     
     result = {
         'device_name': device.product_name,
@@ -494,16 +619,13 @@ def parse_eds_file(eds_path):
                 'cob_id': 0x180 + (pdo_idx * 0x100) + result['node_id'],
                 'mappings': []
             }
-            for map_idx, mapping in enumerate(mappings):
-                obj = device.objects.get(mapping.index)
-                name = obj.name if obj else f"TPDO{pdo_idx + 1}_Signal{map_idx}"
-                
+            for mapping in mappings:
                 tpdo['mappings'].append({
                     'index': mapping.index,
                     'subindex': mapping.subindex,
                     'length': mapping.length,
-                    'signal_id': 100 + pdo_idx * 32 + map_idx,
-                    'name': name
+                    'signal_id': mapping.signal_id,
+                    'name': mapping.name
                 })
             result['tpdos'].append(tpdo)
     
@@ -514,16 +636,13 @@ def parse_eds_file(eds_path):
                 'cob_id': 0x200 + (pdo_idx * 0x100) + result['node_id'],
                 'mappings': []
             }
-            for map_idx, mapping in enumerate(mappings):
-                obj = device.objects.get(mapping.index)
-                name = obj.name if obj else f"RPDO{pdo_idx + 1}_Signal{map_idx}"
-                
+            for mapping in mappings:
                 rpdo['mappings'].append({
                     'index': mapping.index,
                     'subindex': mapping.subindex,
                     'length': mapping.length,
-                    'signal_id': pdo_idx * 32 + map_idx,
-                    'name': name
+                    'signal_id': mapping.signal_id,
+                    'name': mapping.name
                 })
             result['rpdos'].append(rpdo)
     
@@ -549,7 +668,7 @@ def main():
     
     # Parse EDS file
     try:
-        device = parse_eds(args.eds_file)
+        device = parse_eds(args.eds_file, full=args.list_objects)
     except Exception as e:
         import traceback
         print(f"Error parsing EDS file: {e}", file=sys.stderr)
@@ -572,7 +691,7 @@ def main():
     dts_content = generate_device_tree(device, args.node_id, args.node_name, args.output)
     
     if not args.output:
-        print(dts_content)
+        print(dts_content, end='')
     
     # Generate signal header if requested
     if args.signals_header:
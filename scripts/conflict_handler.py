@@ -4,9 +4,116 @@ Requirement Conflict Detection and Resolution
 Handles validation of requirements and provides resolution strategies
 """
 
+import io
+import re
+import sys
+from collections import defaultdict
 from enum import Enum
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable
+
+# Timing constraints in HLR text: "< 50ms", "within 100 milliseconds", "less than 20 ms".
+# Tried in this order; the first pattern that matches anywhere wins.
+_TIMING_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'<\s*(\d+)\s*ms',
+    r'within\s+(\d+)\s*(?:ms|milliseconds)',
+    r'less\s+than\s+(\d+)\s*(?:ms|milliseconds)',
+))
+
+# node_type -> budget buckets it counts against; filled on first sight of each
+# compatible so check_budget_conflict does one dict lookup per LLR
+_BUDGET_BUCKET: Dict[str, tuple] = {}
+
+
+def _budget_buckets(node_type: str) -> tuple:
+    """Budget buckets ('signals', 'cyclic_outputs', 'merges') for a node type"""
+    buckets = _BUDGET_BUCKET.get(node_type)
+    if buckets is None:
+        found = []
+        if 'input' in node_type or 'scale' in node_type or 'verified' in node_type:
+            found.append('signals')
+        if 'cyclic-output' in node_type:
+            found.append('cyclic_outputs')
+        if 'merge' in node_type or 'voter' in node_type:
+            found.append('merges')
+        buckets = _BUDGET_BUCKET[node_type] = tuple(found)
+    return buckets
+
+
+def _id(llr: Any) -> str:
+    """Interned requirement id, so repeated ids across conflicts share one string"""
+    return sys.intern(llr.id)
+
+
+def _strongly_connected_components(graph: Dict[str, List[str]]) -> List[List[str]]:
+    """Iterative Tarjan SCC over an adjacency dict.
+
+    Components are returned in the order their first member was discovered,
+    each listing its members in discovery order.
+    """
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    sccs = []
+    counter = 0
+
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph.get(root, ())))]
+        while work:
+            node, neighbors = work[-1]
+            for neighbor in neighbors:
+                if neighbor not in index:
+                    index[neighbor] = lowlink[neighbor] = counter
+                    counter += 1
+                    stack.append(neighbor)
+                    on_stack.add(neighbor)
+                    work.append((neighbor, iter(graph.get(neighbor, ()))))
+                    break
+                if neighbor in on_stack and index[neighbor] < lowlink[node]:
+                    lowlink[node] = index[neighbor]
+            else:
+                work.pop()
+                if work:
+                    caller = work[-1][0]
+                    if lowlink[node] < lowlink[caller]:
+                        lowlink[caller] = lowlink[node]
+                if lowlink[node] == index[node]:
+                    scc = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        scc.append(member)
+                        if member == node:
+                            break
+                    scc.reverse()
+                    sccs.append(scc)
+
+    sccs.sort(key=lambda scc: index[scc[0]])
+    return sccs
+
+
+def _cycle_in_component(graph: Dict[str, List[str]], scc: List[str]) -> List[str]:
+    """A real dependency cycle through a cyclic SCC, closed on its first node.
+
+    Walks from scc[0] along the first successor that stays inside the
+    component until a node repeats; every member of a cyclic SCC has one.
+    """
+    members = set(scc)
+    path = []
+    position = {}
+    node = scc[0]
+    while node not in position:
+        position[node] = len(path)
+        path.append(node)
+        node = next(n for n in graph.get(node, ()) if n in members)
+    return path[position[node]:] + [node]
 
 
 class ConflictSeverity(Enum):
@@ -40,6 +147,21 @@ class Conflict:
         if self.metadata is None:
             self.metadata = {}
 
+    def full_description(self) -> str:
+        """Description with deferred details (dependency cycle path) filled in
+
+        metadata['cycle'] is one closed dependency path; any other members of
+        the same strongly-connected component are listed without arrows.
+        """
+        cycle = self.metadata.get('cycle')
+        if not cycle:
+            return self.description
+        text = f"{self.description}: {' → '.join(cycle)}"
+        others = [req for req in self.affected_requirements if req not in cycle]
+        if others:
+            text += f" (also circularly dependent: {', '.join(others)})"
+        return text
+
 
 class ConflictHandler:
     """Handles detection and resolution of requirement conflicts"""
@@ -51,18 +173,42 @@ class ConflictHandler:
         """
         self.strict_mode = strict_mode
         self.conflicts: List[Conflict] = []
+        # Same conflicts bucketed by severity, kept in sync by add/remove
+        self._by_severity: Dict[ConflictSeverity, List[Conflict]] = {
+            severity: [] for severity in ConflictSeverity
+        }
+        # Per-LLR/HLR extraction results, keyed by requirement ID and stored
+        # as (object, result). A hit needs the very same object, and a new
+        # object with that ID replaces the entry, so the caches hold at most
+        # one entry (and one requirement object) per ID.
+        self._res_cache: Dict[str, tuple] = {}
+        self._ref_cache: Dict[str, tuple] = {}
+        self._timing_cache: Dict[str, tuple] = {}
 
     def add_conflict(self, conflict: Conflict):
         """Add a detected conflict"""
         self.conflicts.append(conflict)
+        self._by_severity[conflict.severity].append(conflict)
+
+    def add_conflicts(self, conflicts: Iterable[Conflict]):
+        """Add a batch of detected conflicts (e.g. the result of a check_* method)"""
+        conflicts = list(conflicts)
+        self.conflicts.extend(conflicts)
+        by_severity = self._by_severity
+        for conflict in conflicts:
+            by_severity[conflict.severity].append(conflict)
+
+    def _remove_conflict(self, conflict: Conflict):
+        self.conflicts.remove(conflict)
+        self._by_severity[conflict.severity].remove(conflict)
 
     def has_errors(self) -> bool:
         """Check if any ERROR level conflicts exist"""
-        return any(c.severity == ConflictSeverity.ERROR for c in self.conflicts)
+        return bool(self._by_severity[ConflictSeverity.ERROR])
 
     def has_warnings(self) -> bool:
         """Check if any WARNING level conflicts exist"""
-        return any(c.severity == ConflictSeverity.WARNING for c in self.conflicts)
+        return bool(self._by_severity[ConflictSeverity.WARNING])
 
     def should_fail(self) -> bool:
         """Determine if code generation should be blocked"""
@@ -81,7 +227,7 @@ class ConflictHandler:
             resources = self._extract_resources(llr)
 
             for resource_type, resource_id in resources:
-                key = f"{resource_type}:{resource_id}"
+                key = (resource_type, resource_id)
 
                 if key in resource_map:
                     # Hard conflict - two LLRs want same exclusive resource
@@ -89,7 +235,7 @@ class ConflictHandler:
                         severity=ConflictSeverity.ERROR,
                         type=ConflictType.RESOURCE,
                         description=f"Multiple requirements claim {resource_type} {resource_id}",
-                        affected_requirements=[resource_map[key], llr.id],
+                        affected_requirements=[resource_map[key], _id(llr)],
                         resolution_strategies=[
                             f"Assign different {resource_type} to one requirement",
                             "Add hardware multiplexer/sharing mechanism",
@@ -102,7 +248,7 @@ class ConflictHandler:
                         }
                     ))
                 else:
-                    resource_map[key] = llr.id
+                    resource_map[key] = _id(llr)
 
         return conflicts
 
@@ -110,6 +256,11 @@ class ConflictHandler:
         """Detect timing requirement violations"""
         conflicts = []
 
+        # Index LLRs by the HLR they implement
+        children_by_parent = defaultdict(list)
+        for llr in llrs:
+            children_by_parent[llr.parent].append(llr)
+
         for hlr in hlrs:
             # Extract timing constraint from HLR (e.g., "< 50ms")
             required_time = self._extract_timing_requirement(hlr)
@@ -117,7 +268,7 @@ class ConflictHandler:
                 continue
 
             # Find all LLRs implementing this HLR
-            child_llrs = [llr for llr in llrs if llr.parent == hlr.id]
+            child_llrs = children_by_parent.get(hlr.id, [])
 
             # Calculate worst-case latency from LLR implementation
             actual_time = self._calculate_latency(child_llrs)
@@ -130,7 +281,7 @@ class ConflictHandler:
                     severity=severity,
                     type=ConflictType.TIMING,
                     description=f"{hlr.id} requires <{required_time}ms but implementation takes ~{actual_time}ms",
-                    affected_requirements=[hlr.id] + [llr.id for llr in child_llrs],
+                    affected_requirements=[_id(hlr)] + [_id(llr) for llr in child_llrs],
                     resolution_strategies=[
                         f"Reduce engine cycle time to achieve <{required_time}ms",
                         f"Relax {hlr.id} timing requirement to <{actual_time * 1.2}ms",
@@ -151,66 +302,54 @@ class ConflictHandler:
         """Detect circular or missing dependencies"""
         conflicts = []
 
-        # Build node_name to LLR ID mapping
+        # Build node_name to LLR ID mapping and the set of known LLR IDs
         node_to_llr = {}
+        all_llr_ids = set()
         for llr in llrs:
+            llr_id = _id(llr)
+            all_llr_ids.add(llr_id)
             node_name = llr.implementation.get('node_name')
             if node_name:
-                node_to_llr[node_name] = llr.id
+                node_to_llr[node_name] = llr_id
 
-        # Build dependency graph
+        # Build dependency graph once node_to_llr is complete
+        # (deps kept per LLR for the missing-deps scan)
+        deps_by_llr = []
         graph = {}
         for llr in llrs:
-            graph[llr.id] = self._extract_dependencies(llr, node_to_llr)
-
-        # Check for circular dependencies
-        visited = set()
-        rec_stack = set()
-
-        def has_cycle(node: str, path: List[str]) -> Optional[List[str]]:
-            visited.add(node)
-            rec_stack.add(node)
-
-            for neighbor in graph.get(node, []):
-                if neighbor not in visited:
-                    cycle = has_cycle(neighbor, path + [neighbor])
-                    if cycle:
-                        return cycle
-                elif neighbor in rec_stack:
-                    # Found cycle
-                    return path[path.index(neighbor):] + [neighbor]
-
-            rec_stack.remove(node)
-            return None
-
-        for llr_id in graph:
-            if llr_id not in visited:
-                cycle = has_cycle(llr_id, [llr_id])
-                if cycle:
-                    conflicts.append(Conflict(
-                        severity=ConflictSeverity.ERROR,
-                        type=ConflictType.DEPENDENCY,
-                        description=f"Circular dependency detected: {' → '.join(cycle)}",
-                        affected_requirements=cycle[:-1],  # Remove duplicate at end
-                        resolution_strategies=[
-                            "Break cycle by removing one dependency",
-                            "Add intermediate signal to resolve cycle",
-                            "Restructure requirements to avoid circular reference"
-                        ],
-                        auto_resolvable=False,
-                        metadata={'cycle': cycle}
-                    ))
+            deps = self._extract_dependencies(llr, node_to_llr)
+            deps_by_llr.append(deps)
+            graph[_id(llr)] = deps
+
+        # Check for circular dependencies: every strongly-connected component
+        # with more than one member (or a self-loop) contains a cycle
+        for scc in _strongly_connected_components(graph):
+            if len(scc) == 1 and scc[0] not in graph.get(scc[0], ()):
+                continue
+            conflicts.append(Conflict(
+                severity=ConflictSeverity.ERROR,
+                type=ConflictType.DEPENDENCY,
+                # Cycle path is joined only when the report is rendered
+                description="Circular dependency detected",
+                affected_requirements=scc,
+                resolution_strategies=[
+                    "Break cycle by removing one dependency",
+                    "Add intermediate signal to resolve cycle",
+                    "Restructure requirements to avoid circular reference"
+                ],
+                auto_resolvable=False,
+                metadata={'cycle': tuple(_cycle_in_component(graph, scc))}
+            ))
 
         # Check for missing dependencies
-        all_llr_ids = {llr.id for llr in llrs}
-        for llr in llrs:
-            for dep in self._extract_dependencies(llr, node_to_llr):
+        for llr, deps in zip(llrs, deps_by_llr):
+            for dep in deps:
                 if dep not in all_llr_ids:
                     conflicts.append(Conflict(
                         severity=ConflictSeverity.ERROR,
                         type=ConflictType.DEPENDENCY,
                         description=f"{llr.id} depends on {dep} which does not exist",
-                        affected_requirements=[llr.id],
+                        affected_requirements=[_id(llr)],
                         resolution_strategies=[
                             f"Create missing requirement {dep}",
                             f"Update {llr.id} to reference correct requirement",
@@ -233,13 +372,12 @@ class ConflictHandler:
         }
 
         for llr in llrs:
-            node_type = llr.implementation.get('node_type', '')
-            if 'input' in node_type or 'scale' in node_type or 'verified' in node_type:
-                counts['signals'] += 1
-            if 'cyclic-output' in node_type:
-                counts['cyclic_outputs'] += 1
-            if 'merge' in node_type or 'voter' in node_type:
-                counts['merges'] += 1
+            for bucket in _budget_buckets(llr.implementation.get('node_type', '')):
+                counts[bucket] += 1
+
+        # All LLRs contribute to every budget; the id list is shared between
+        # the conflicts below, so callers must not mutate it
+        all_ids = [_id(llr) for llr in llrs]
 
         # Check against limits
         for resource, count in counts.items():
@@ -249,7 +387,7 @@ class ConflictHandler:
                     severity=ConflictSeverity.WARNING,
                     type=ConflictType.BUDGET,
                     description=f"Resource budget exceeded: {count} {resource} used, limit is {limit}",
-                    affected_requirements=[llr.id for llr in llrs],  # All LLRs contribute
+                    affected_requirements=all_ids,
                     resolution_strategies=[
                         f"Increase max-{resource.replace('_', '-')} in engine configuration",
                         f"Reduce number of {resource} by combining requirements",
@@ -271,54 +409,50 @@ class ConflictHandler:
         if not self.conflicts:
             return "✅ No conflicts detected\n"
 
-        lines = []
-        lines.append(f"\n{'='*60}")
-        lines.append("REQUIREMENT CONFLICT REPORT")
-        lines.append(f"{'='*60}\n")
+        rule = '=' * 60
+        buf = io.StringIO()
+        w = buf.write
+        w(f"\n{rule}\nREQUIREMENT CONFLICT REPORT\n{rule}\n\n")
 
-        errors = [c for c in self.conflicts if c.severity == ConflictSeverity.ERROR]
-        warnings = [c for c in self.conflicts if c.severity == ConflictSeverity.WARNING]
-        infos = [c for c in self.conflicts if c.severity == ConflictSeverity.INFO]
+        errors = self._by_severity[ConflictSeverity.ERROR]
+        warnings = self._by_severity[ConflictSeverity.WARNING]
+        infos = self._by_severity[ConflictSeverity.INFO]
 
-        if errors:
-            lines.append(f"🚫 ERRORS: {len(errors)} (code generation blocked)")
-            for i, conflict in enumerate(errors, 1):
-                lines.append(f"\n[E{i}] {conflict.type.value.upper()}")
-                lines.append(f"    {conflict.description}")
-                lines.append(f"    Affects: {', '.join(conflict.affected_requirements)}")
+        def write_conflicts(prefix: str, conflicts: List[Conflict]):
+            for i, conflict in enumerate(conflicts, 1):
+                w(f"\n[{prefix}{i}] {conflict.type.value.upper()}\n"
+                  f"    {conflict.full_description()}\n"
+                  f"    Affects: {', '.join(conflict.affected_requirements)}\n")
                 if verbose:
-                    lines.append(f"    Resolutions:")
-                    for j, strategy in enumerate(conflict.resolution_strategies, 1):
-                        lines.append(f"      {j}) {strategy}")
+                    w("    Resolutions:\n")
+                    w("".join(f"      {j}) {strategy}\n"
+                              for j, strategy in enumerate(conflict.resolution_strategies, 1)))
+
+        if errors:
+            w(f"🚫 ERRORS: {len(errors)} (code generation blocked)\n")
+            write_conflicts('E', errors)
 
         if warnings:
-            lines.append(f"\n⚠️  WARNINGS: {len(warnings)}")
-            for i, conflict in enumerate(warnings, 1):
-                lines.append(f"\n[W{i}] {conflict.type.value.upper()}")
-                lines.append(f"    {conflict.description}")
-                lines.append(f"    Affects: {', '.join(conflict.affected_requirements)}")
-                if verbose:
-                    lines.append(f"    Resolutions:")
-                    for j, strategy in enumerate(conflict.resolution_strategies, 1):
-                        lines.append(f"      {j}) {strategy}")
+            w(f"\n⚠️  WARNINGS: {len(warnings)}\n")
+            write_conflicts('W', warnings)
 
         if infos:
-            lines.append(f"\nℹ️  INFO: {len(infos)}")
+            w(f"\nℹ️  INFO: {len(infos)}\n")
             if verbose:
                 for i, conflict in enumerate(infos, 1):
-                    lines.append(f"\n[I{i}] {conflict.type.value.upper()}")
-                    lines.append(f"    {conflict.description}")
+                    w(f"\n[I{i}] {conflict.type.value.upper()}\n"
+                      f"    {conflict.full_description()}\n")
 
-        lines.append(f"\n{'='*60}")
+        w(f"\n{rule}\n")
 
         if self.should_fail():
-            lines.append("❌ Code generation BLOCKED - resolve errors first")
+            w("❌ Code generation BLOCKED - resolve errors first\n")
         else:
-            lines.append("✅ Code generation allowed (review warnings)")
+            w("✅ Code generation allowed (review warnings)\n")
 
-        lines.append(f"{'='*60}\n")
+        w(f"{rule}\n")
 
-        return '\n'.join(lines)
+        return buf.getvalue()
 
     def auto_resolve(self) -> int:
         """Attempt to automatically resolve conflicts where possible
@@ -334,7 +468,7 @@ class ConflictHandler:
                     # Auto-increase resource limits
                     print(f"Auto-resolving: Increasing {conflict.metadata['resource']} "
                           f"limit to {conflict.metadata['suggested_limit']}")
-                    self.conflicts.remove(conflict)
+                    self._remove_conflict(conflict)
                     resolved_count += 1
 
         return resolved_count
@@ -342,6 +476,10 @@ class ConflictHandler:
     # Helper methods
     def _extract_resources(self, llr: Any) -> List[tuple]:
         """Extract hardware resources from LLR"""
+        cached = self._res_cache.get(llr.id)
+        if cached is not None and cached[0] is llr:
+            return cached[1]
+
         resources = []
         props = llr.implementation.get('properties', {})
 
@@ -360,26 +498,27 @@ class ConflictHandler:
         if 'target-id' in props and llr.implementation.get('node_type') == 'lq,cyclic-output':
             resources.append(('can_cobid', props['target-id']))
 
+        self._res_cache[llr.id] = (llr, resources)
         return resources
 
     def _extract_timing_requirement(self, hlr: Any) -> Optional[float]:
         """Extract timing requirement from HLR text (e.g., '< 50ms' -> 50.0)"""
-        import re
+        key = getattr(hlr, 'id', None)
+        cached = self._timing_cache.get(key)
+        if cached is not None and cached[0] is hlr:
+            return cached[1]
+
         # Look for patterns like "< 50ms", "within 100 milliseconds", etc.
         text = hlr.text if hasattr(hlr, 'text') else str(hlr)
-
-        patterns = [
-            r'<\s*(\d+)\s*ms',
-            r'within\s+(\d+)\s*(?:ms|milliseconds)',
-            r'less\s+than\s+(\d+)\s*(?:ms|milliseconds)'
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        required = None
+        for timing_re in _TIMING_RES:
+            match = timing_re.search(text)
             if match:
-                return float(match.group(1))
+                required = float(match.group(1))
+                break
 
-        return None
+        self._timing_cache[key] = (hlr, required)
+        return required
 
     def _calculate_latency(self, llrs: List[Any]) -> float:
         """Calculate worst-case latency from LLR chain"""
@@ -391,8 +530,8 @@ class ConflictHandler:
             latency += 10.0  # Assume 10ms cycle time
 
             # Add specific delays
-            if 'period-us' in llr.implementation.get('properties', {}):
-                period_us = llr.implementation['properties']['period-us']
+            period_us = llr.implementation.get('properties', {}).get('period-us')
+            if period_us is not None:
                 latency += period_us / 1000.0  # Convert to ms
 
         return latency
@@ -400,6 +539,23 @@ class ConflictHandler:
     def _extract_dependencies(self, llr: Any, node_to_llr: Dict[str, str] = None) -> List[str]:
         """Extract requirement dependencies from LLR"""
         deps = []
+        for node_name in self._extract_phandle_refs(llr):
+            # Map node name to LLR ID
+            if node_to_llr and node_name in node_to_llr:
+                deps.append(node_to_llr[node_name])
+            else:
+                # Fallback: use node name as-is (will trigger missing dependency error)
+                deps.append(node_name)
+
+        return deps
+
+    def _extract_phandle_refs(self, llr: Any) -> List[str]:
+        """Node names an LLR references through phandle properties"""
+        cached = self._ref_cache.get(llr.id)
+        if cached is not None and cached[0] is llr:
+            return cached[1]
+
+        refs = []
         props = llr.implementation.get('properties', {})
 
         # Check for phandle references
@@ -408,15 +564,10 @@ class ConflictHandler:
                 # Parse "<&node_name>" to extract dependency
                 dep = props[key]
                 if isinstance(dep, str) and '<&' in dep:
-                    # Extract node name and map to LLR ID
-                    node_name = dep.strip('<&>')
-                    if node_to_llr and node_name in node_to_llr:
-                        deps.append(node_to_llr[node_name])
-                    else:
-                        # Fallback: use node name as-is (will trigger missing dependency error)
-                        deps.append(node_name)
+                    refs.append(dep.strip('<&>'))
 
-        return deps
+        self._ref_cache[llr.id] = (llr, refs)
+        return refs
 
 
 if __name__ == "__main__":
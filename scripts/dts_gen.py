@@ -18,6 +18,8 @@ Examples:
 
 import sys
 import re
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
 
 # Import platform adaptors if available
@@ -28,7 +30,184 @@ except ImportError:
     PLATFORM_SUPPORT = False
     print("Warning: platform_adaptors.py not found. Platform-specific generation disabled.")
 
+# Comments, stripped before parsing (block comments in unrolled-loop form)
+_DTS_STRIP = re.compile(r'//[^\n]*|/\*[^*]*\*+(?:[^/*][^*]*\*+)*/')
+# Node header: label: node-name@addr {
+_NODE_HEAD_RE = re.compile(r'(\w+):\s*[\w-]+(?:@(\w+))?\s*\{')
+_COMPAT_RE = re.compile(r'compatible\s*=\s*"([^"]+)"')
+_PROP_RE = re.compile(r'([\w-]+)\s*=\s*([^;]+);')
+# Valueless boolean flags: one alternation scanned once per node, hits mapped
+# back to property names (set in this order so properties stay stable)
+_BOOL_PROPS = {
+    'signed': 'signed',
+    'check-staleness': 'check_staleness',
+    'check-range': 'check_range',
+    'check-status': 'check_status',
+}
+_BOOL_RE = re.compile(r'\b(%s)\b' % '|'.join(_BOOL_PROPS))
+# CANopen device nodes referencing an EDS file (--expand-eds)
+_CANOPEN_HEAD_RE = re.compile(r'(\w+):\s*(canopen-device@\d+)\s*\{')
+_EDS_PROP_RE = re.compile(r'eds\s*=\s*"([^"]+)"')
+_NODE_ID_PROP_RE = re.compile(r'node-id\s*=\s*<(\d+)>')
+
+# Processing nodes that are auto-assigned a signal ID of their own
+_SIGNAL_NODE_COMPATS = frozenset(('lq,scale', 'lq,remap', 'lq,pid', 'lq,mid-merge'))
+
+# calculate_resource_counts: compatible -> count it increments
+# (lq,hw-* inputs are matched by prefix)
+_RESOURCE_COUNT_KEYS = {
+    'lq-scale': 'num_scales',
+    'lq,scale': 'num_scales',
+    'lq,remap': 'num_remaps',
+    'lq,mid-merge': 'num_merges',
+    'lq,fault-monitor': 'num_fault_monitors',
+    'lq,cyclic-output': 'num_cyclic_outputs',
+    'lq,pid': 'num_pid_controllers',
+    'lq,pid-controller': 'num_pid_controllers',
+    'lq,verified-output': 'num_verified_outputs',
+}
+
+# Engine struct initializers, one template per array entry
+_VOTE_METHODS = {
+    'median': 'LQ_VOTE_MEDIAN',
+    'average': 'LQ_VOTE_AVERAGE',
+    'min': 'LQ_VOTE_MIN',
+    'max': 'LQ_VOTE_MAX',
+}
+_OUTPUT_TYPES = {
+    'can': 'LQ_OUTPUT_CAN',
+    'j1939': 'LQ_OUTPUT_J1939',
+    'canopen': 'LQ_OUTPUT_CANOPEN',
+    'gpio': 'LQ_OUTPUT_GPIO',
+    'uart': 'LQ_OUTPUT_UART',
+}
+_MERGE_TPL = (
+    "        [%s] = {\n"
+    "            .output_signal = %s,\n"
+    "            .input_signals = {%s},\n"
+    "            .num_inputs = %s,\n"
+    "            .voting_method = %s,\n"
+    "            .tolerance = %s,\n"
+    "            .stale_us = %s,\n"
+    "            .enabled = true,\n"
+    "        },\n"
+)
+_FAULT_TPL = (
+    "        [%s] = {\n"
+    "            .input_signal = %s,\n"
+    "            .fault_output_signal = %s,\n"
+    "            .check_staleness = %s,\n"
+    "            .stale_timeout_us = %s,\n"
+    "            .check_range = %s,\n"
+    "            .min_value = %s,\n"
+    "            .max_value = %s,\n"
+    "            .check_status = %s,\n"
+    "            .fault_level = %s,\n"
+    "            .wake = %s,\n"
+    "            .enabled = true,\n"
+    "        },\n"
+)
+# Hardware input ISRs: compatible -> (comment name, function prefix, value type)
+_HW_ISR_KINDS = {
+    'lq,hw-adc-input': ('ADC', 'adc', 'uint16_t'),
+    'lq,hw-spi-input': ('SPI', 'spi', 'int32_t'),
+}
+_HW_ISR_TPL = (
+    "/* %s ISR for %s */\n"
+    "void lq_%s_isr_%s(%s value) {\n"
+    "    lq_hw_push(%s, (uint32_t)value);\n"
+    "}\n\n"
+)
+# Cyclic output types that transmit through lq_can_send
+_CAN_OUTPUT_TYPES = frozenset(('j1939', 'canopen', 'can'))
+_CYCLIC_TPL = (
+    "        [%s] = {\n"
+    "            .type = %s,\n"
+    "            .target_id = %s,\n"
+    "            .source_signal = %s,\n"
+    "            .period_us = %s,\n"
+    "            .next_deadline = %s,\n"
+    "            .flags = 0,\n"
+    "            .enabled = true,\n"
+    "        },\n"
+)
+
+def _scan_blocks(dts_content, head_re):
+    """Yield (head match, body end) for each block opened by `head_re`.
+
+    Bodies are brace-matched with str.find in one linear walk. A body may hold
+    one level of child nodes; a block nested deeper than that is skipped and
+    the blocks inside it are reported instead.
+    """
+    find = dts_content.find
+    pos = 0
+    while True:
+        head = head_re.search(dts_content, pos)
+        if head is None:
+            return
+        body_end = None
+        depth = 1
+        i = head.end()
+        next_open = find('{', i)
+        while True:
+            next_close = find('}', i)
+            if next_close < 0:
+                break
+            if 0 <= next_open < next_close:
+                depth += 1
+                if depth > 2:
+                    break
+                i = next_open + 1
+                next_open = find('{', i)
+            else:
+                depth -= 1
+                if depth == 0:
+                    body_end = next_close
+                    break
+                i = next_close + 1
+        if body_end is None:
+            # Unterminated or too deeply nested: look for blocks inside it
+            pos = head.start() + 1
+            continue
+        yield head, body_end
+        pos = body_end + 1
+
+def _tokenize_nodes(dts_content):
+    """Yield (label, address, body) for each `label: name@addr { ... }` node."""
+    for head, body_end in _scan_blocks(dts_content, _NODE_HEAD_RE):
+        yield head.group(1), head.group(2), dts_content[head.end():body_end]
+
+# Characters of a property name, for str.rstrip
+_PROP_NAME_CHARS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-'
+
+def _iter_properties(content):
+    """Yield (name, raw value) for each `name = value;` statement in a node body.
+
+    Statements are split on ';' and '='; the name is the identifier directly
+    before the '='. Properties of one-level child nodes are included, as they
+    always were.
+    """
+    stmts = content.split(';')
+    stmts.pop()  # text after the last ';' is not a complete statement
+    for stmt in stmts:
+        lhs, sep, rhs = stmt.partition('=')
+        if not sep or not rhs:
+            continue
+        lhs = lhs.rstrip()
+        head = lhs.rstrip(_PROP_NAME_CHARS)
+        if len(head) == len(lhs) or (head and head[-1].isalnum()):
+            # Unusual statement (no name before the first '=', non-ASCII
+            # name): let the regex decide
+            match = _PROP_RE.search(stmt + ';')
+            if match:
+                yield match.group(1), match.group(2)
+            continue
+        yield lhs[len(head):], rhs
+
 class DTSNode:
+    # signal_id is assigned by resolve_phandles_and_assign_ids
+    __slots__ = ('label', 'compatible', 'address', 'properties', 'children', 'signal_id')
+    
     def __init__(self, label, compatible, address=None):
         self.label = label
         self.compatible = compatible
@@ -223,82 +402,100 @@ def generate_device_tree_content(eds_data, label, address):
 
 def parse_property_value(value):
     """Parse DTS property value - handle <>, "", arrays, phandles"""
-    value = value.strip().rstrip(';')
+    parsed = _parse_property_value(value)
+    # Arrays are cached as tuples; hand out a list the caller may modify
+    return list(parsed) if type(parsed) is tuple else parsed
+
+def _cell_int(cell):
+    """int(cell, 0), skipping the base-prefix parse for plain decimal cells"""
+    # int(x, 0) rejects leading zeros, so '007' must still take the slow path
+    if cell.isdecimal() and (cell[0] != '0' or len(cell) == 1):
+        return int(cell)
+    return int(cell, 0)
+
+def _parse_angle_value(value):
+    """<...> cells: phandle(s), a single integer or an integer array"""
+    inner = value[1:-1].strip()
     
     # Phandle reference: <&sensor> or <&sensor1 &sensor2>
-    if value.startswith('<') and '&' in value:
-        inner = value[1:-1].strip()
+    if '&' in value:
         # Multiple phandles: <&s1 &s2 &s3>
         if ' ' in inner:
-            refs = [ref.strip()[1:] if ref.strip().startswith('&') else ref.strip() 
-                   for ref in inner.split()]
-            return refs
+            return tuple(ref[1:] if ref.startswith('&') else ref for ref in inner.split())
         # Single phandle: <&sensor>
         return inner[1:] if inner.startswith('&') else inner
     
     # Array of integers: <1 2 3>
-    if value.startswith('<') and value.endswith('>'):
-        inner = value[1:-1].strip()
+    if value.endswith('>'):
         nums = inner.split()
         if len(nums) == 1:
             try:
-                return int(nums[0], 0)  # Single value
+                return _cell_int(nums[0])  # Single value
             except ValueError:
                 return nums[0]
         try:
-            return [int(n, 0) for n in nums]  # Array
+            return tuple(map(_cell_int, nums))  # Array
         except ValueError:
-            return nums
+            return tuple(nums)
     
-    # String: "median"
-    if value.startswith('"') and value.endswith('"'):
-        return value[1:-1]
+    return value
+
+def _parse_quoted_value(value):
+    """Quoted string, e.g. "median" -> median"""
+    return value[1:-1] if value.endswith('"') else value
+
+# First character of a property value -> parser for that form
+_VALUE_PARSERS = {
+    '<': _parse_angle_value,
+    '"': _parse_quoted_value,
+}
+
+@lru_cache(maxsize=4096)
+def _parse_property_value(value):
+    """Cached worker for parse_property_value; arrays come back as tuples.
+
+    Keys are raw property right-hand sides from the DTS, a small vocabulary
+    (<0>, <1>, "median", phandles) that repeats across nodes.
+    """
+    value = value.strip().rstrip(';')
     
     # Boolean flag (property exists with no value)
     if not value:
         return True
     
-    return value
+    parser = _VALUE_PARSERS.get(value[0])
+    return parser(value) if parser else value
 
 def simple_dts_parser(dts_content):
     """Simplified DTS parser - extracts compatible nodes with properties"""
     nodes = []
     
-    # Remove comments
-    dts_content = re.sub(r'//.*?\n', '\n', dts_content)
-    dts_content = re.sub(r'/\*.*?\*/', '', dts_content, flags=re.DOTALL)
+    # Remove // and /* */ comments in one pass, if there are any
+    if '//' in dts_content or '/*' in dts_content:
+        dts_content = _DTS_STRIP.sub('', dts_content)
     
     # Find all node definitions
-    # Pattern: label: node-name@addr { ... }
-    node_pattern = r'(\w+):\s*[\w-]+(?:@([\w]+))?\s*\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
-    
-    for match in re.finditer(node_pattern, dts_content):
-        label = match.group(1)
-        address = match.group(2)
-        content = match.group(3)
-        
+    for label, address, content in _tokenize_nodes(dts_content):
         # Extract compatible
-        compat_match = re.search(r'compatible\s*=\s*"([^"]+)"', content)
+        compat_match = _COMPAT_RE.search(content)
         if not compat_match:
             continue
-        compatible = compat_match.group(1)
+        # Compatibles and property names repeat across nodes: intern them so
+        # the generators' comparisons and dict lookups hit the identity fast path
+        compatible = sys.intern(compat_match.group(1))
         
         node = DTSNode(label, compatible, address)
         
         # Extract properties
-        prop_pattern = r'([\w-]+)\s*=\s*([^;]+);'
-        for prop_match in re.finditer(prop_pattern, content):
-            prop_name = prop_match.group(1).replace('-', '_')
-            prop_value = parse_property_value(prop_match.group(2))
-            node.properties[prop_name] = prop_value
+        for prop_name, prop_value in _iter_properties(content):
+            node.properties[sys.intern(prop_name.replace('-', '_'))] = parse_property_value(prop_value)
         
         # Check for boolean properties (no value) - standalone keywords
-        bool_props = ['signed', 'check_staleness', 'check_range', 'check_status']
-        for bool_prop in bool_props:
-            # Convert from kebab-case to snake_case for matching
-            dts_prop = bool_prop.replace('_', '-')
-            if re.search(rf'\b{dts_prop}\b', content) and bool_prop not in node.properties:
-                node.properties[bool_prop] = True
+        keywords = set(_BOOL_RE.findall(content))
+        if keywords:
+            for keyword, bool_prop in _BOOL_PROPS.items():
+                if keyword in keywords and bool_prop not in node.properties:
+                    node.properties[bool_prop] = True
         
         nodes.append(node)
     
@@ -316,6 +513,8 @@ def resolve_phandles_and_assign_ids(nodes):
     
     Backward compatibility:
     - signal-id, source-signal, input-signal, etc. still work
+    
+    Afterwards input_signal_ids, where present, is always a list of IDs.
     """
     # Build label->node map
     label_map = {node.label: node for node in nodes}
@@ -333,7 +532,7 @@ def resolve_phandles_and_assign_ids(nodes):
             signal_id = max(signal_id, node.signal_id + 1)
         # Hardware inputs and processing nodes get signal IDs
         elif (node.compatible.startswith('lq,hw-') or 
-              node.compatible in ['lq,scale', 'lq,remap', 'lq,pid', 'lq,mid-merge']):
+              node.compatible in _SIGNAL_NODE_COMPATS):
             node.signal_id = signal_id
             node.properties['signal_id'] = signal_id
             signal_id += 1
@@ -435,36 +634,24 @@ def calculate_resource_counts(nodes):
         'hw_ringbuffer_size': 128,  # Default, can be overridden by engine node
     }
     
-    # Check for engine node with overrides
-    engine_nodes = [n for n in nodes if n.compatible == 'lq,engine']
-    if engine_nodes:
-        eng = engine_nodes[0]
-        if 'hw_ringbuffer_size' in eng.properties:
-            counts['hw_ringbuffer_size'] = eng.properties['hw_ringbuffer_size']
-    
-    # Count nodes by type
+    # Count nodes by type; the first engine node may override defaults
+    engine_node = None
     for node in nodes:
-        if node.compatible.startswith('lq,hw-'):
+        compat = node.compatible
+        count_key = _RESOURCE_COUNT_KEYS.get(compat)
+        if count_key:
+            counts[count_key] += 1
+            if count_key == 'num_merges':
+                # Track max merge input count
+                input_ids = node.properties.get('input_signal_ids', [])
+                counts['max_merge_inputs'] = max(counts['max_merge_inputs'], len(input_ids))
+        elif compat.startswith('lq,hw-'):
             counts['num_hw_inputs'] += 1
-        elif node.compatible == 'lq-scale' or node.compatible == 'lq,scale':
-            counts['num_scales'] += 1
-        elif node.compatible == 'lq,remap':
-            counts['num_remaps'] += 1
-        elif node.compatible == 'lq,mid-merge':
-            counts['num_merges'] += 1
-            # Track max merge input count
-            input_ids = node.properties.get('input_signal_ids', [])
-            if isinstance(input_ids, int):
-                input_ids = [input_ids]
-            counts['max_merge_inputs'] = max(counts['max_merge_inputs'], len(input_ids))
-        elif node.compatible == 'lq,fault-monitor':
-            counts['num_fault_monitors'] += 1
-        elif node.compatible == 'lq,cyclic-output':
-            counts['num_cyclic_outputs'] += 1
-        elif node.compatible == 'lq,pid' or node.compatible == 'lq,pid-controller':
-            counts['num_pid_controllers'] += 1
-        elif node.compatible == 'lq,verified-output':
-            counts['num_verified_outputs'] += 1
+        elif compat == 'lq,engine' and engine_node is None:
+            engine_node = node
+    
+    if engine_node and 'hw_ringbuffer_size' in engine_node.properties:
+        counts['hw_ringbuffer_size'] = engine_node.properties['hw_ringbuffer_size']
     
     # Calculate total signal count (max signal ID + 1)
     max_signal_id = 0
@@ -484,6 +671,21 @@ def calculate_resource_counts(nodes):
     return counts
 
 
+def _write_if_changed(path, content):
+    """Write a generated file unless it already holds exactly this content.
+
+    An unchanged file keeps its timestamp, so the build does not recompile
+    everything that includes it.
+    """
+    try:
+        with open(path, 'r') as f:
+            if f.read() == content:
+                return
+    except (OSError, UnicodeDecodeError):
+        pass
+    with open(path, 'w') as f:
+        f.write(content)
+
 def generate_config_header(counts, output_path):
     """Generate lq_config.h with exact resource counts from devicetree"""
     
@@ -494,8 +696,7 @@ def generate_config_header(counts, output_path):
     
     signal_saving_pct = int((1 - counts['num_signals'] / default_signals) * 100) if counts['num_signals'] < default_signals else 0
     
-    with open(output_path, 'w') as f:
-        f.write("""/*
+    _write_if_changed(output_path, """/*
  * AUTO-GENERATED FILE - DO NOT EDIT
  * Generated from devicetree by scripts/dts_gen.py
  * 
@@ -533,21 +734,21 @@ def generate_config_header(counts, output_path):
 
 #endif /* LQ_CONFIG_H_ */
 """.format(
-            num_signals=counts['num_signals'],
-            default_signals=default_signals,
-            signal_saving_pct=signal_saving_pct,
-            num_hw_inputs=counts['num_hw_inputs'],
-            num_scales=counts['num_scales'],
-            num_remaps=counts['num_remaps'],
-            num_merges=counts['num_merges'],
-            num_fault_monitors=counts['num_fault_monitors'],
-            num_cyclic_outputs=counts['num_cyclic_outputs'],
-            num_pid_controllers=counts['num_pid_controllers'],
-            num_verified_outputs=counts['num_verified_outputs'],
-            max_merge_inputs=counts['max_merge_inputs'],
-            max_output_events=counts['max_output_events'],
-            hw_ringbuffer_size=counts['hw_ringbuffer_size']
-        ))
+        num_signals=counts['num_signals'],
+        default_signals=default_signals,
+        signal_saving_pct=signal_saving_pct,
+        num_hw_inputs=counts['num_hw_inputs'],
+        num_scales=counts['num_scales'],
+        num_remaps=counts['num_remaps'],
+        num_merges=counts['num_merges'],
+        num_fault_monitors=counts['num_fault_monitors'],
+        num_cyclic_outputs=counts['num_cyclic_outputs'],
+        num_pid_controllers=counts['num_pid_controllers'],
+        num_verified_outputs=counts['num_verified_outputs'],
+        max_merge_inputs=counts['max_merge_inputs'],
+        max_output_events=counts['max_output_events'],
+        hw_ringbuffer_size=counts['hw_ringbuffer_size']
+    ))
 
 
 def generate_prj_conf(counts, nodes, output_path):
@@ -595,9 +796,12 @@ def generate_prj_conf(counts, nodes, output_path):
     lines.append('CONFIG_SYSTEM_WORKQUEUE_STACK_SIZE=2048')
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w') as f:
-        f.write('\n'.join(lines) + '\n')
+    _write_if_changed(output_path, '\n'.join(lines) + '\n')
+
 
+def _wake_functions(fault_monitors):
+    """Sorted, de-duplicated wake callbacks named by the fault monitors"""
+    return sorted({fn for fn in (fm.properties.get('wake_function') for fm in fault_monitors) if fn})
 
 def generate_header(nodes, output_path):
     """Generate lq_generated.h with declarations"""
@@ -608,8 +812,8 @@ def generate_header(nodes, output_path):
     # Collect fault monitors for wake function declarations
     fault_monitors = [n for n in nodes if n.compatible == 'lq,fault-monitor']
     
-    with open(output_path, 'w') as f:
-        f.write("""/*
+    out = []
+    out.append("""/*
  * AUTO-GENERATED FILE - DO NOT EDIT
  * Generated from devicetree by scripts/dts_gen.py
  */
@@ -633,37 +837,212 @@ int lq_generated_init(void);
 void lq_generated_dispatch_outputs(void);
 
 """)
-        
-        # Add ISR handler declarations
-        if hw_inputs:
-            f.write("/* Hardware ISR handlers */\n")
-            for hw in hw_inputs:
-                if 'adc' in hw.compatible:
-                    f.write(f"void lq_adc_isr_{hw.label}(uint16_t value);\n")
-                elif 'spi' in hw.compatible:
-                    f.write(f"void lq_spi_isr_{hw.label}(int32_t value);\n")
-            f.write("\n")
-        
-        # Add fault wake function declarations
-        if fault_monitors:
-            wake_functions = set()
-            for fm in fault_monitors:
-                wake_fn = fm.properties.get('wake_function')
-                if wake_fn:
-                    wake_functions.add(wake_fn)
-            
-            if wake_functions:
-                f.write("/* Fault monitor wake callbacks */\n")
-                for wake_fn in sorted(wake_functions):
-                    f.write(f"void {wake_fn}(uint8_t monitor_id, int32_t input_value, enum lq_fault_level fault_level);\n")
-                f.write("\n")
-        
-        f.write("""#ifdef __cplusplus
+    
+    # Add ISR handler declarations
+    if hw_inputs:
+        out.append("/* Hardware ISR handlers */\n")
+        for hw in hw_inputs:
+            if 'adc' in hw.compatible:
+                out.append(f"void lq_adc_isr_{hw.label}(uint16_t value);\n")
+            elif 'spi' in hw.compatible:
+                out.append(f"void lq_spi_isr_{hw.label}(int32_t value);\n")
+        out.append("\n")
+    
+    # Add fault wake function declarations
+    if fault_monitors:
+        wake_functions = _wake_functions(fault_monitors)
+        if wake_functions:
+            out.append("/* Fault monitor wake callbacks */\n")
+            for wake_fn in wake_functions:
+                out.append(f"void {wake_fn}(uint8_t monitor_id, int32_t input_value, enum lq_fault_level fault_level);\n")
+            out.append("\n")
+    
+    out.append("""#ifdef __cplusplus
 }
 #endif
 
 #endif /* LQ_GENERATED_H_ */
 """)
+    
+    _write_if_changed(output_path, ''.join(out))
+
+# lq_generated_init(): fixed parts around the optional crosscheck setup
+_INIT_HEAD = (
+    "/* Initialization */\n"
+    "int lq_generated_init(void) {\n"
+    "    /* Auto-detect HIL mode on native platform (if not already initialized) */\n"
+    "    #ifdef LQ_PLATFORM_NATIVE\n"
+    "    if (!lq_hil_is_active()) {\n"
+    "        lq_hil_init(LQ_HIL_MODE_DISABLED, getenv(\"LQ_HIL_MODE\"), 0);\n"
+    "    }\n"
+    "    #endif\n"
+    "    \n"
+    "    /* Initialize engine */\n"
+    "    int ret = lq_engine_init(&g_lq_engine);\n"
+    "    if (ret != 0) return ret;\n"
+    "    \n"
+    "    /* Hardware input layer */\n"
+    "    ret = lq_hw_input_init(64);\n"
+    "    if (ret != 0) return ret;\n"
+    "    \n"
+)
+_INIT_CROSSCHECK_TPL = (
+    "    /* Initialize event crosscheck (dual-channel safety) */\n"
+    "    ret = lq_crosscheck_init(&g_crosscheck_ctx, %s, %s, %s);\n"
+    "    if (ret != 0) return ret;\n"
+    "    \n"
+)
+_INIT_TAIL = (
+    "    /* Platform-specific peripheral init */\n"
+    "    #ifdef LQ_PLATFORM_INIT\n"
+    "    lq_platform_peripherals_init();\n"
+    "    #endif\n"
+    "    \n"
+    "    return 0;\n"
+    "}\n\n"
+)
+# lq_generated_dispatch_outputs(): fixed parts and one switch case per output type
+_DISPATCH_HEAD = (
+    "/* Output event dispatcher */\n"
+    "void lq_generated_dispatch_outputs(void) {\n"
+)
+_DISPATCH_CROSSCHECK = (
+    "    /* Send events to other MCU for dual-channel verification */\n"
+    "    for (size_t i = 0; i < g_lq_engine.out_event_count; i++) {\n"
+    "        lq_crosscheck_send_event(&g_crosscheck_ctx, &g_lq_engine.out_events[i]);\n"
+    "    }\n"
+    "    \n"
+)
+_DISPATCH_LOOP_HEAD = (
+    "    /* Dispatch output events to appropriate protocol drivers/hardware */\n"
+    "    for (size_t i = 0; i < g_lq_engine.out_event_count; i++) {\n"
+    "        struct lq_output_event *evt = &g_lq_engine.out_events[i];\n"
+    "        \n"
+    "        switch (evt->type) {\n"
+)
+_DISPATCH_TAIL = (
+    "            default:\n"
+    "                /* Unknown output type - ignore */\n"
+    "                break;\n"
+    "        }\n"
+    "    }\n"
+    "}\n"
+)
+_DISPATCH_CASES = (
+    ('j1939', (
+        "            case LQ_OUTPUT_J1939: {\n"
+        "                /* J1939 output: encode value and send via CAN */\n"
+        "                uint8_t data[8] = {0};\n"
+        "                data[0] = (uint8_t)(evt->value & 0xFF);\n"
+        "                data[1] = (uint8_t)((evt->value >> 8) & 0xFF);\n"
+        "                data[2] = (uint8_t)((evt->value >> 16) & 0xFF);\n"
+        "                data[3] = (uint8_t)((evt->value >> 24) & 0xFF);\n"
+        "                \n"
+        "                /* Build CAN ID from PGN (target_id) */\n"
+        "                uint32_t can_id = lq_j1939_build_id_from_pgn(evt->target_id, 6, 0);\n"
+        "                lq_can_send(can_id, true, data, 8);\n"
+        "                break;\n"
+        "            }\n"
+    )),
+    ('canopen', (
+        "            case LQ_OUTPUT_CANOPEN: {\n"
+        "                /* CANopen output: encode PDO and send */\n"
+        "                uint8_t data[8] = {0};\n"
+        "                data[0] = (uint8_t)(evt->value & 0xFF);\n"
+        "                data[1] = (uint8_t)((evt->value >> 8) & 0xFF);\n"
+        "                data[2] = (uint8_t)((evt->value >> 16) & 0xFF);\n"
+        "                data[3] = (uint8_t)((evt->value >> 24) & 0xFF);\n"
+        "                \n"
+        "                /* target_id is COB-ID */\n"
+        "                lq_can_send(evt->target_id, false, data, 4);\n"
+        "                break;\n"
+        "            }\n"
+    )),
+    ('spi', (
+        "            case LQ_OUTPUT_SPI: {\n"
+        "                /* SPI output: target_id is device/CS, value is data */\n"
+        "                uint8_t data[4];\n"
+        "                data[0] = (uint8_t)(evt->value & 0xFF);\n"
+        "                data[1] = (uint8_t)((evt->value >> 8) & 0xFF);\n"
+        "                data[2] = (uint8_t)((evt->value >> 16) & 0xFF);\n"
+        "                data[3] = (uint8_t)((evt->value >> 24) & 0xFF);\n"
+        "                lq_spi_send((uint8_t)evt->target_id, data, 4);\n"
+        "                break;\n"
+        "            }\n"
+    )),
+    ('i2c', (
+        "            case LQ_OUTPUT_I2C: {\n"
+        "                /* I2C output: target_id bits[15:8]=addr, bits[7:0]=register */\n"
+        "                uint8_t addr = (uint8_t)((evt->target_id >> 8) & 0xFF);\n"
+        "                uint8_t reg = (uint8_t)(evt->target_id & 0xFF);\n"
+        "                uint8_t data[4];\n"
+        "                data[0] = (uint8_t)(evt->value & 0xFF);\n"
+        "                data[1] = (uint8_t)((evt->value >> 8) & 0xFF);\n"
+        "                data[2] = (uint8_t)((evt->value >> 16) & 0xFF);\n"
+        "                data[3] = (uint8_t)((evt->value >> 24) & 0xFF);\n"
+        "                lq_i2c_write(addr, reg, data, 4);\n"
+        "                break;\n"
+        "            }\n"
+    )),
+    ('pwm', (
+        "            case LQ_OUTPUT_PWM: {\n"
+        "                /* PWM output: target_id is channel, value is duty cycle */\n"
+        "                lq_pwm_set((uint8_t)evt->target_id, (uint32_t)evt->value);\n"
+        "                break;\n"
+        "            }\n"
+    )),
+    ('dac', (
+        "            case LQ_OUTPUT_DAC: {\n"
+        "                /* DAC output: target_id is channel, value is analog level */\n"
+        "                lq_dac_write((uint8_t)evt->target_id, (uint16_t)evt->value);\n"
+        "                break;\n"
+        "            }\n"
+    )),
+    ('modbus', (
+        "            case LQ_OUTPUT_MODBUS: {\n"
+        "                /* Modbus output: target_id bits[23:16]=slave, bits[15:0]=register */\n"
+        "                uint8_t slave = (uint8_t)((evt->target_id >> 16) & 0xFF);\n"
+        "                uint16_t reg = (uint16_t)(evt->target_id & 0xFFFF);\n"
+        "                lq_modbus_write(slave, reg, (uint16_t)evt->value);\n"
+        "                break;\n"
+        "            }\n"
+    )),
+    ('can', (
+        "            case LQ_OUTPUT_CAN: {\n"
+        "                /* Raw CAN output */\n"
+        "                uint8_t data[8] = {0};\n"
+        "                data[0] = (uint8_t)(evt->value & 0xFF);\n"
+        "                data[1] = (uint8_t)((evt->value >> 8) & 0xFF);\n"
+        "                data[2] = (uint8_t)((evt->value >> 16) & 0xFF);\n"
+        "                data[3] = (uint8_t)((evt->value >> 24) & 0xFF);\n"
+        "                \n"
+        "                bool extended = (evt->flags & 1) != 0;\n"
+        "                lq_can_send(evt->target_id, extended, data, 8);\n"
+        "                break;\n"
+        "            }\n"
+    )),
+    ('gpio', (
+        "            case LQ_OUTPUT_GPIO: {\n"
+        "                /* GPIO output: target_id is pin number */\n"
+        "                lq_gpio_set((uint8_t)evt->target_id, evt->value != 0);\n"
+        "                break;\n"
+        "            }\n"
+    )),
+    ('uart', (
+        "            case LQ_OUTPUT_UART: {\n"
+        "                /* UART output: send as ASCII string */\n"
+        "                char buf[32];\n"
+        "                int len = snprintf(buf, sizeof(buf), \"%d\\n\", evt->value);\n"
+        "                lq_uart_send((uint8_t*)buf, len);\n"
+        "                break;\n"
+        "            }\n"
+    )),
+)
+
+@lru_cache(maxsize=1024)
+def _ids_str(ids):
+    """C initializer list body for a tuple of signal IDs; merges often share inputs"""
+    return ', '.join(map(str, ids))
 
 def generate_source(nodes, output_path):
     """Generate lq_generated.c with engine struct and ISRs"""
@@ -675,54 +1054,48 @@ def generate_source(nodes, output_path):
     fault_monitors = []
     cyclic_outputs = []
     crosscheck_nodes = []
+    # Exact compatibles go straight to their list; the rest fall through
+    categories = {
+        'lq,mid-merge': merges,
+        'lq,fault-monitor': fault_monitors,
+        'lq,cyclic-output': cyclic_outputs,
+        'lq,event-crosscheck': crosscheck_nodes,
+    }
     
     for node in nodes:
-        if node.compatible == 'lq,engine':
+        compat = node.compatible
+        category = categories.get(compat)
+        if category is not None:
+            category.append(node)
+        elif compat == 'lq,engine':
             engine_node = node
         # Generalized input/output support
-        elif node.compatible in ['lq,input', 'lq,output']:
+        elif compat in ('lq,input', 'lq,output'):
             # For now, treat as hardware input/output (CAN only)
             # If device property references a CAN device, treat as CAN input/output
             dev = node.properties.get('device')
             if dev and (isinstance(dev, str) and 'can' in dev.lower()):
-                if node.compatible == 'lq,input':
+                if compat == 'lq,input':
                     node.compatible = 'lq,hw-can-input'
                     hw_inputs.append(node)
-                elif node.compatible == 'lq,output':
+                else:
                     node.compatible = 'lq,cyclic-output'
                     cyclic_outputs.append(node)
             # TODO: Add support for ADC, UART, etc. in future
-        elif node.compatible.startswith('lq,hw-'):
+        elif compat.startswith('lq,hw-'):
             hw_inputs.append(node)
-        elif node.compatible == 'lq,mid-merge':
-            merges.append(node)
-        elif node.compatible == 'lq,fault-monitor':
-            fault_monitors.append(node)
-        elif node.compatible == 'lq,cyclic-output':
-            cyclic_outputs.append(node)
-        elif node.compatible == 'lq,event-crosscheck':
-            crosscheck_nodes.append(node)
     
     # Calculate maximum signal ID
-    max_signal_id = 0
-    for node in hw_inputs:
-        signal_id = node.properties.get('signal_id', 0)
-        max_signal_id = max(max_signal_id, signal_id)
-    for node in merges:
-        output_id = node.properties.get('output_signal_id', 0)
-        input_ids = node.properties.get('input_signal_ids', [])
-        if isinstance(input_ids, int):
-            input_ids = [input_ids]
-        max_signal_id = max(max_signal_id, output_id)
-        if input_ids:
-            max_signal_id = max(max_signal_id, max(input_ids))
-    for node in cyclic_outputs:
-        source_id = node.properties.get('source_signal_id', 0)
-        max_signal_id = max(max_signal_id, source_id)
-    for node in fault_monitors:
-        input_id = node.properties.get('input_signal_id', 0)
-        output_id = node.properties.get('fault_output_signal_id', 0)
-        max_signal_id = max(max_signal_id, input_id, output_id)
+    max_signal_id = max(chain(
+        (0,),
+        (node.properties.get('signal_id', 0) for node in hw_inputs),
+        (node.properties.get('output_signal_id', 0) for node in merges),
+        chain.from_iterable(node.properties.get('input_signal_ids', []) for node in merges),
+        (node.properties.get('source_signal_id', 0) for node in cyclic_outputs),
+        chain.from_iterable((node.properties.get('input_signal_id', 0),
+                             node.properties.get('fault_output_signal_id', 0))
+                            for node in fault_monitors),
+    ))
     
     num_signals = max_signal_id + 1  # +1 because IDs are 0-indexed
     
@@ -732,8 +1105,10 @@ def generate_source(nodes, output_path):
         output_type = node.properties.get('output_type', 'can')
         output_types_used.add(output_type)
     
-    with open(output_path, 'w') as f:
-        f.write("""/*
+    uses_can = not output_types_used.isdisjoint(_CAN_OUTPUT_TYPES)
+    
+    out = []
+    out.append("""/*
  * AUTO-GENERATED FILE - DO NOT EDIT
  * Generated from devicetree by scripts/dts_gen.py
  */
@@ -744,406 +1119,180 @@ def generate_source(nodes, output_path):
 #include "lq_event.h"
 #include "lq_hil.h"
 """)
-        
-        # Add protocol-specific includes based on what's used
-        if 'j1939' in output_types_used:
-            f.write("#include \"lq_j1939.h\"\n")
-        if 'canopen' in output_types_used:
-            f.write("#include \"lq_canopen.h\"\n")
-        
-        # Add crosscheck include if enabled
-        if crosscheck_nodes:
-            f.write("#include \"lq_event_crosscheck.h\"\n")
-        
-        # Add platform includes if any CAN-based output is used
-        if any(t in output_types_used for t in ['j1939', 'canopen', 'can']):
-            f.write("#include \"lq_platform.h\"  /* For lq_can_send */\n")
-        if 'gpio' in output_types_used:
-            f.write("#include \"lq_platform.h\"  /* For lq_gpio_set */\n")
-        if 'uart' in output_types_used:
-            f.write("#include \"lq_platform.h\"  /* For lq_uart_send */\n")
-        if 'spi' in output_types_used:
-            f.write("#include \"lq_platform.h\"  /* For lq_spi_send */\n")
-        if 'i2c' in output_types_used:
-            f.write("#include \"lq_platform.h\"  /* For lq_i2c_write */\n")
-        if 'pwm' in output_types_used:
-            f.write("#include \"lq_platform.h\"  /* For lq_pwm_set */\n")
-        if 'dac' in output_types_used:
-            f.write("#include \"lq_platform.h\"  /* For lq_dac_write */\n")
-        if 'modbus' in output_types_used:
-            f.write("#include \"lq_platform.h\"  /* For lq_modbus_write */\n")
-        
-        f.write("#include <stdlib.h>\n")
-        f.write("#include <string.h>\n")
-        f.write("\n")
-        
-        # Platform function declarations (portable approach)
-        # Note: Implementations can be provided by:
-        # 1. User's platform-specific code
-        # 2. Linking with lq_platform_stubs.c (provides default no-op implementations)
-        # 3. Weak symbols on GNU toolchains (see lq_platform_stubs.c)
-        f.write("/* Platform function declarations - implement these in your platform code\n")
-        f.write(" * or link with lq_platform_stubs.c for default no-op implementations */\n")
-        
-        if any(t in output_types_used for t in ['j1939', 'canopen', 'can']):
-            f.write("extern int lq_can_send(uint32_t can_id, bool is_extended, const uint8_t *data, uint8_t len);\n")
-        
-        if 'gpio' in output_types_used:
-            f.write("extern int lq_gpio_set(uint8_t pin, bool state);\n")
-        
-        if 'uart' in output_types_used:
-            f.write("extern int lq_uart_send(const uint8_t *data, size_t len);\n")
-        
-        if 'spi' in output_types_used:
-            f.write("extern int lq_spi_send(uint8_t device, const uint8_t *data, size_t len);\n")
-        
-        if 'i2c' in output_types_used:
-            f.write("extern int lq_i2c_write(uint8_t addr, uint8_t reg, const uint8_t *data, size_t len);\n")
-        
-        if 'pwm' in output_types_used:
-            f.write("extern int lq_pwm_set(uint8_t channel, uint32_t duty_cycle);\n")
-        
-        if 'dac' in output_types_used:
-            f.write("extern int lq_dac_write(uint8_t channel, uint16_t value);\n")
-        
-        if 'modbus' in output_types_used:
-            f.write("extern int lq_modbus_write(uint8_t slave_id, uint16_t reg, uint16_t value);\n")
-        
-        f.write("\n")
-        
-        # Generate engine instance with inline array initialization
-        f.write("/* Engine instance */\n")
-        f.write("struct lq_engine g_lq_engine = {\n")
-        f.write(f"    .num_signals = {num_signals},\n")
-        f.write(f"    .num_merges = {len(merges)},\n")
-        f.write(f"    .num_fault_monitors = {len(fault_monitors)},\n")
-        f.write(f"    .num_cyclic_outputs = {len(cyclic_outputs)},\n")
-        
-        # Inline merge contexts
-        if merges:
-            f.write("    .merges = {\n")
-            for i, node in enumerate(merges):
-                vote_method_map = {
-                    'median': 'LQ_VOTE_MEDIAN',
-                    'average': 'LQ_VOTE_AVERAGE',
-                    'min': 'LQ_VOTE_MIN',
-                    'max': 'LQ_VOTE_MAX',
-                }
-                vote_method = vote_method_map.get(node.properties.get('voting_method', 'median'))
-                
-                input_ids = node.properties.get('input_signal_ids', [])
-                if isinstance(input_ids, int):
-                    input_ids = [input_ids]
-                
-                f.write(f"        [{i}] = {{\n")
-                f.write(f"            .output_signal = {node.signal_id},\n")
-                f.write(f"            .input_signals = {{{', '.join(map(str, input_ids))}}},\n")
-                f.write(f"            .num_inputs = {len(input_ids)},\n")
-                f.write(f"            .voting_method = {vote_method},\n")
-                f.write(f"            .tolerance = {node.properties.get('tolerance', 0)},\n")
-                f.write(f"            .stale_us = {node.properties.get('stale_us', 0)},\n")
-                f.write(f"            .enabled = true,\n")
-                f.write(f"        }},\n")
-            f.write("    },\n")
-        
-        # Inline fault monitor contexts
-        if fault_monitors:
-            f.write("    .fault_monitors = {\n")
-            for i, node in enumerate(fault_monitors):
-                f.write(f"        [{i}] = {{\n")
-                f.write(f"            .input_signal = {node.properties.get('input_signal_id', 0)},\n")
-                f.write(f"            .fault_output_signal = {node.properties.get('fault_output_signal_id', 0)},\n")
-                
-                # Fault condition flags
-                check_staleness = 'check_staleness' in node.properties
-                check_range = 'check_range' in node.properties
-                check_status = 'check_status' in node.properties
-                
-                f.write(f"            .check_staleness = {'true' if check_staleness else 'false'},\n")
-                if check_staleness:
-                    f.write(f"            .stale_timeout_us = {node.properties.get('stale_timeout_us', 1000000)},\n")
-                else:
-                    f.write(f"            .stale_timeout_us = 0,\n")
-                
-                f.write(f"            .check_range = {'true' if check_range else 'false'},\n")
-                if check_range:
-                    f.write(f"            .min_value = {node.properties.get('min_value', 0)},\n")
-                    f.write(f"            .max_value = {node.properties.get('max_value', 65535)},\n")
-                else:
-                    f.write(f"            .min_value = 0,\n")
-                    f.write(f"            .max_value = 0,\n")
-                
-                f.write(f"            .check_status = {'true' if check_status else 'false'},\n")
-                
-                # Fault level
-                fault_level = node.properties.get('fault_level', 1)
-                f.write(f"            .fault_level = {fault_level},\n")
-                
-                # Wake function
-                wake_fn = node.properties.get('wake_function')
-                if wake_fn:
-                    f.write(f"            .wake = {wake_fn},\n")
-                else:
-                    f.write(f"            .wake = NULL,\n")
-                
-                f.write(f"            .enabled = true,\n")
-                f.write(f"        }},\n")
-            f.write("    },\n")
-        
-        # Inline cyclic output contexts
-        if cyclic_outputs:
-            f.write("    .cyclic_outputs = {\n")
-            for i, node in enumerate(cyclic_outputs):
-                output_type_map = {
-                    'can': 'LQ_OUTPUT_CAN',
-                    'j1939': 'LQ_OUTPUT_J1939',
-                    'canopen': 'LQ_OUTPUT_CANOPEN',
-                    'gpio': 'LQ_OUTPUT_GPIO',
-                    'uart': 'LQ_OUTPUT_UART',
-                }
-                output_type = output_type_map.get(node.properties.get('output_type', 'can'))
-                
-                f.write(f"        [{i}] = {{\n")
-                f.write(f"            .type = {output_type},\n")
-                f.write(f"            .target_id = {node.properties.get('target_id', 0)},\n")
-                f.write(f"            .source_signal = {node.properties.get('source_signal_id', 0)},\n")
-                f.write(f"            .period_us = {node.properties.get('period_us', 100000)},\n")
-                f.write(f"            .next_deadline = {node.properties.get('deadline_offset_us', 0)},\n")
-                f.write(f"            .flags = 0,\n")
-                f.write(f"            .enabled = true,\n")
-                f.write(f"        }},\n")
-            f.write("    },\n")
-        
-        f.write("};\n\n")
-        
-        # Generate crosscheck context if enabled
-        if crosscheck_nodes:
-            crosscheck = crosscheck_nodes[0]  # Use first crosscheck node
-            f.write("/* Event crosscheck context (dual-channel safety) */\n")
-            f.write("static struct lq_crosscheck_ctx g_crosscheck_ctx;\n\n")
-        
-        # Generate ISR handlers for hardware inputs
-        for node in hw_inputs:
-            signal_id = node.properties.get('signal_id', 0)
-            
-            if node.compatible == 'lq,hw-adc-input':
-                f.write(f"/* ADC ISR for {node.label} */\n")
-                f.write(f"void lq_adc_isr_{node.label}(uint16_t value) {{\n")
-                f.write(f"    lq_hw_push({signal_id}, (uint32_t)value);\n")
-                f.write(f"}}\n\n")
-            
-            elif node.compatible == 'lq,hw-spi-input':
-                f.write(f"/* SPI ISR for {node.label} */\n")
-                f.write(f"void lq_spi_isr_{node.label}(int32_t value) {{\n")
-                f.write(f"    lq_hw_push({signal_id}, (uint32_t)value);\n")
-                f.write(f"}}\n\n")
-        
-        # Generate weak stub implementations for fault wake functions
-        wake_functions = set()
-        for fm in fault_monitors:
-            wake_fn = fm.properties.get('wake_function')
-            if wake_fn:
-                wake_functions.add(wake_fn)
-        
-        if wake_functions:
-            f.write("/* Fault monitor wake callbacks - weak stubs (user can override) */\n")
-            for wake_fn in sorted(wake_functions):
-                f.write(f"__weak\n")
-                f.write(f"void {wake_fn}(uint8_t monitor_id, int32_t input_value, enum lq_fault_level fault_level) {{\n")
-                f.write(f"    /* Default: no action. Override this function to implement safety response. */\n")
-                f.write(f"    (void)monitor_id;\n")
-                f.write(f"    (void)input_value;\n")
-                f.write(f"    (void)fault_level;\n")
-                f.write(f"}}\n\n")
-        
-        # Generate init function
-        f.write("/* Initialization */\n")
-        f.write("int lq_generated_init(void) {\n")
-        f.write("    /* Auto-detect HIL mode on native platform (if not already initialized) */\n")
-        f.write("    #ifdef LQ_PLATFORM_NATIVE\n")
-        f.write("    if (!lq_hil_is_active()) {\n")
-        f.write("        lq_hil_init(LQ_HIL_MODE_DISABLED, getenv(\"LQ_HIL_MODE\"), 0);\n")
-        f.write("    }\n")
-        f.write("    #endif\n")
-        f.write("    \n")
-        f.write("    /* Initialize engine */\n")
-        f.write("    int ret = lq_engine_init(&g_lq_engine);\n")
-        f.write("    if (ret != 0) return ret;\n")
-        f.write("    \n")
-        f.write("    /* Hardware input layer */\n")
-        f.write("    ret = lq_hw_input_init(64);\n")
-        f.write("    if (ret != 0) return ret;\n")
-        f.write("    \n")
-        
-        # Add crosscheck initialization if enabled
-        if crosscheck_nodes:
-            crosscheck = crosscheck_nodes[0]
-            uart_id = crosscheck.properties.get('uart_id', 1)
-            timeout_ms = crosscheck.properties.get('timeout_ms', 50)
-            fail_gpio = crosscheck.properties.get('fail_gpio', 25)
-            
-            f.write("    /* Initialize event crosscheck (dual-channel safety) */\n")
-            f.write(f"    ret = lq_crosscheck_init(&g_crosscheck_ctx, {uart_id}, {timeout_ms}, {fail_gpio});\n")
-            f.write("    if (ret != 0) return ret;\n")
-            f.write("    \n")
-        
-        f.write("    /* Platform-specific peripheral init */\n")
-        f.write("    #ifdef LQ_PLATFORM_INIT\n")
-        f.write("    lq_platform_peripherals_init();\n")
-        f.write("    #endif\n")
-        f.write("    \n")
-        f.write("    return 0;\n")
-        f.write("}\n\n")
-        
-        # Generate output dispatch function
-        f.write("/* Output event dispatcher */\n")
-        f.write("void lq_generated_dispatch_outputs(void) {\n")
-        
-        # Add crosscheck send hook if enabled
-        if crosscheck_nodes:
-            f.write("    /* Send events to other MCU for dual-channel verification */\n")
-            f.write("    for (size_t i = 0; i < g_lq_engine.out_event_count; i++) {\n")
-            f.write("        lq_crosscheck_send_event(&g_crosscheck_ctx, &g_lq_engine.out_events[i]);\n")
-            f.write("    }\n")
-            f.write("    \n")
-        
-        f.write("    /* Dispatch output events to appropriate protocol drivers/hardware */\n")
-        f.write("    for (size_t i = 0; i < g_lq_engine.out_event_count; i++) {\n")
-        f.write("        struct lq_output_event *evt = &g_lq_engine.out_events[i];\n")
-        f.write("        \n")
-        f.write("        switch (evt->type) {\n")
-        
-        # Determine which output types are actually used
-        output_types_used = set()
-        for node in cyclic_outputs:
-            output_type = node.properties.get('output_type', 'can')
-            output_types_used.add(output_type)
-        
-        # Generate dispatch cases for each used output type
-        if 'j1939' in output_types_used:
-            f.write("            case LQ_OUTPUT_J1939: {\n")
-            f.write("                /* J1939 output: encode value and send via CAN */\n")
-            f.write("                uint8_t data[8] = {0};\n")
-            f.write("                data[0] = (uint8_t)(evt->value & 0xFF);\n")
-            f.write("                data[1] = (uint8_t)((evt->value >> 8) & 0xFF);\n")
-            f.write("                data[2] = (uint8_t)((evt->value >> 16) & 0xFF);\n")
-            f.write("                data[3] = (uint8_t)((evt->value >> 24) & 0xFF);\n")
-            f.write("                \n")
-            f.write("                /* Build CAN ID from PGN (target_id) */\n")
-            f.write("                uint32_t can_id = lq_j1939_build_id_from_pgn(evt->target_id, 6, 0);\n")
-            f.write("                lq_can_send(can_id, true, data, 8);\n")
-            f.write("                break;\n")
-            f.write("            }\n")
-        
-        if 'canopen' in output_types_used:
-            f.write("            case LQ_OUTPUT_CANOPEN: {\n")
-            f.write("                /* CANopen output: encode PDO and send */\n")
-            f.write("                uint8_t data[8] = {0};\n")
-            f.write("                data[0] = (uint8_t)(evt->value & 0xFF);\n")
-            f.write("                data[1] = (uint8_t)((evt->value >> 8) & 0xFF);\n")
-            f.write("                data[2] = (uint8_t)((evt->value >> 16) & 0xFF);\n")
-            f.write("                data[3] = (uint8_t)((evt->value >> 24) & 0xFF);\n")
-            f.write("                \n")
-            f.write("                /* target_id is COB-ID */\n")
-            f.write("                lq_can_send(evt->target_id, false, data, 4);\n")
-            f.write("                break;\n")
-            f.write("            }\n")
-        
-        if 'spi' in output_types_used:
-            f.write("            case LQ_OUTPUT_SPI: {\n")
-            f.write("                /* SPI output: target_id is device/CS, value is data */\n")
-            f.write("                uint8_t data[4];\n")
-            f.write("                data[0] = (uint8_t)(evt->value & 0xFF);\n")
-            f.write("                data[1] = (uint8_t)((evt->value >> 8) & 0xFF);\n")
-            f.write("                data[2] = (uint8_t)((evt->value >> 16) & 0xFF);\n")
-            f.write("                data[3] = (uint8_t)((evt->value >> 24) & 0xFF);\n")
-            f.write("                lq_spi_send((uint8_t)evt->target_id, data, 4);\n")
-            f.write("                break;\n")
-            f.write("            }\n")
-        
-        if 'i2c' in output_types_used:
-            f.write("            case LQ_OUTPUT_I2C: {\n")
-            f.write("                /* I2C output: target_id bits[15:8]=addr, bits[7:0]=register */\n")
-            f.write("                uint8_t addr = (uint8_t)((evt->target_id >> 8) & 0xFF);\n")
-            f.write("                uint8_t reg = (uint8_t)(evt->target_id & 0xFF);\n")
-            f.write("                uint8_t data[4];\n")
-            f.write("                data[0] = (uint8_t)(evt->value & 0xFF);\n")
-            f.write("                data[1] = (uint8_t)((evt->value >> 8) & 0xFF);\n")
-            f.write("                data[2] = (uint8_t)((evt->value >> 16) & 0xFF);\n")
-            f.write("                data[3] = (uint8_t)((evt->value >> 24) & 0xFF);\n")
-            f.write("                lq_i2c_write(addr, reg, data, 4);\n")
-            f.write("                break;\n")
-            f.write("            }\n")
-        
-        if 'pwm' in output_types_used:
-            f.write("            case LQ_OUTPUT_PWM: {\n")
-            f.write("                /* PWM output: target_id is channel, value is duty cycle */\n")
-            f.write("                lq_pwm_set((uint8_t)evt->target_id, (uint32_t)evt->value);\n")
-            f.write("                break;\n")
-            f.write("            }\n")
-        
-        if 'dac' in output_types_used:
-            f.write("            case LQ_OUTPUT_DAC: {\n")
-            f.write("                /* DAC output: target_id is channel, value is analog level */\n")
-            f.write("                lq_dac_write((uint8_t)evt->target_id, (uint16_t)evt->value);\n")
-            f.write("                break;\n")
-            f.write("            }\n")
-        
-        if 'modbus' in output_types_used:
-            f.write("            case LQ_OUTPUT_MODBUS: {\n")
-            f.write("                /* Modbus output: target_id bits[23:16]=slave, bits[15:0]=register */\n")
-            f.write("                uint8_t slave = (uint8_t)((evt->target_id >> 16) & 0xFF);\n")
-            f.write("                uint16_t reg = (uint16_t)(evt->target_id & 0xFFFF);\n")
-            f.write("                lq_modbus_write(slave, reg, (uint16_t)evt->value);\n")
-            f.write("                break;\n")
-            f.write("            }\n")
-        
-            f.write("                data[0] = (uint8_t)(evt->value & 0xFF);\n")
-            f.write("                data[1] = (uint8_t)((evt->value >> 8) & 0xFF);\n")
-            f.write("                data[2] = (uint8_t)((evt->value >> 16) & 0xFF);\n")
-            f.write("                data[3] = (uint8_t)((evt->value >> 24) & 0xFF);\n")
-            f.write("                \n")
-            f.write("                /* target_id is COB-ID */\n")
-            f.write("                lq_can_send(evt->target_id, false, data, 4);\n")
-            f.write("                break;\n")
-            f.write("            }\n")
-        
-        if 'can' in output_types_used:
-            f.write("            case LQ_OUTPUT_CAN: {\n")
-            f.write("                /* Raw CAN output */\n")
-            f.write("                uint8_t data[8] = {0};\n")
-            f.write("                data[0] = (uint8_t)(evt->value & 0xFF);\n")
-            f.write("                data[1] = (uint8_t)((evt->value >> 8) & 0xFF);\n")
-            f.write("                data[2] = (uint8_t)((evt->value >> 16) & 0xFF);\n")
-            f.write("                data[3] = (uint8_t)((evt->value >> 24) & 0xFF);\n")
-            f.write("                \n")
-            f.write("                bool extended = (evt->flags & 1) != 0;\n")
-            f.write("                lq_can_send(evt->target_id, extended, data, 8);\n")
-            f.write("                break;\n")
-            f.write("            }\n")
-        
-        if 'gpio' in output_types_used:
-            f.write("            case LQ_OUTPUT_GPIO: {\n")
-            f.write("                /* GPIO output: target_id is pin number */\n")
-            f.write("                lq_gpio_set((uint8_t)evt->target_id, evt->value != 0);\n")
-            f.write("                break;\n")
-            f.write("            }\n")
-        
-        if 'uart' in output_types_used:
-            f.write("            case LQ_OUTPUT_UART: {\n")
-            f.write("                /* UART output: send as ASCII string */\n")
-            f.write("                char buf[32];\n")
-            f.write("                int len = snprintf(buf, sizeof(buf), \"%d\\n\", evt->value);\n")
-            f.write("                lq_uart_send((uint8_t*)buf, len);\n")
-            f.write("                break;\n")
-            f.write("            }\n")
-        
-        f.write("            default:\n")
-        f.write("                /* Unknown output type - ignore */\n")
-        f.write("                break;\n")
-        f.write("        }\n")
-        f.write("    }\n")
-        f.write("}\n")
+    
+    # Add protocol-specific includes based on what's used
+    if 'j1939' in output_types_used:
+        out.append("#include \"lq_j1939.h\"\n")
+    if 'canopen' in output_types_used:
+        out.append("#include \"lq_canopen.h\"\n")
+    
+    # Add crosscheck include if enabled
+    if crosscheck_nodes:
+        out.append("#include \"lq_event_crosscheck.h\"\n")
+    
+    # Add platform includes if any CAN-based output is used
+    if uses_can:
+        out.append("#include \"lq_platform.h\"  /* For lq_can_send */\n")
+    if 'gpio' in output_types_used:
+        out.append("#include \"lq_platform.h\"  /* For lq_gpio_set */\n")
+    if 'uart' in output_types_used:
+        out.append("#include \"lq_platform.h\"  /* For lq_uart_send */\n")
+    if 'spi' in output_types_used:
+        out.append("#include \"lq_platform.h\"  /* For lq_spi_send */\n")
+    if 'i2c' in output_types_used:
+        out.append("#include \"lq_platform.h\"  /* For lq_i2c_write */\n")
+    if 'pwm' in output_types_used:
+        out.append("#include \"lq_platform.h\"  /* For lq_pwm_set */\n")
+    if 'dac' in output_types_used:
+        out.append("#include \"lq_platform.h\"  /* For lq_dac_write */\n")
+    if 'modbus' in output_types_used:
+        out.append("#include \"lq_platform.h\"  /* For lq_modbus_write */\n")
+    
+    out.append("#include <stdlib.h>\n")
+    out.append("#include <string.h>\n")
+    out.append("\n")
+    
+    # Platform function declarations (portable approach)
+    # Note: Implementations can be provided by:
+    # 1. User's platform-specific code
+    # 2. Linking with lq_platform_stubs.c (provides default no-op implementations)
+    # 3. Weak symbols on GNU toolchains (see lq_platform_stubs.c)
+    out.append("/* Platform function declarations - implement these in your platform code\n")
+    out.append(" * or link with lq_platform_stubs.c for default no-op implementations */\n")
+    
+    if uses_can:
+        out.append("extern int lq_can_send(uint32_t can_id, bool is_extended, const uint8_t *data, uint8_t len);\n")
+    
+    if 'gpio' in output_types_used:
+        out.append("extern int lq_gpio_set(uint8_t pin, bool state);\n")
+    
+    if 'uart' in output_types_used:
+        out.append("extern int lq_uart_send(const uint8_t *data, size_t len);\n")
+    
+    if 'spi' in output_types_used:
+        out.append("extern int lq_spi_send(uint8_t device, const uint8_t *data, size_t len);\n")
+    
+    if 'i2c' in output_types_used:
+        out.append("extern int lq_i2c_write(uint8_t addr, uint8_t reg, const uint8_t *data, size_t len);\n")
+    
+    if 'pwm' in output_types_used:
+        out.append("extern int lq_pwm_set(uint8_t channel, uint32_t duty_cycle);\n")
+    
+    if 'dac' in output_types_used:
+        out.append("extern int lq_dac_write(uint8_t channel, uint16_t value);\n")
+    
+    if 'modbus' in output_types_used:
+        out.append("extern int lq_modbus_write(uint8_t slave_id, uint16_t reg, uint16_t value);\n")
+    
+    out.append("\n")
+    
+    # Generate engine instance with inline array initialization
+    out.append("/* Engine instance */\n")
+    out.append("struct lq_engine g_lq_engine = {\n")
+    out.append(f"    .num_signals = {num_signals},\n")
+    out.append(f"    .num_merges = {len(merges)},\n")
+    out.append(f"    .num_fault_monitors = {len(fault_monitors)},\n")
+    out.append(f"    .num_cyclic_outputs = {len(cyclic_outputs)},\n")
+    
+    # Inline merge contexts
+    if merges:
+        out.append("    .merges = {\n")
+        for i, node in enumerate(merges):
+            get = node.properties.get
+            input_ids = get('input_signal_ids', [])
+            out.append(_MERGE_TPL % (
+                i, node.signal_id, _ids_str(tuple(input_ids)), len(input_ids),
+                _VOTE_METHODS.get(get('voting_method', 'median')),
+                get('tolerance', 0), get('stale_us', 0)))
+        out.append("    },\n")
+    
+    # Inline fault monitor contexts
+    if fault_monitors:
+        out.append("    .fault_monitors = {\n")
+        for i, node in enumerate(fault_monitors):
+            props = node.properties
+            get = props.get
+            # Fault condition flags; limits are zeroed for checks that are off
+            check_staleness = 'check_staleness' in props
+            check_range = 'check_range' in props
+            out.append(_FAULT_TPL % (
+                i, get('input_signal_id', 0), get('fault_output_signal_id', 0),
+                'true' if check_staleness else 'false',
+                get('stale_timeout_us', 1000000) if check_staleness else 0,
+                'true' if check_range else 'false',
+                get('min_value', 0) if check_range else 0,
+                get('max_value', 65535) if check_range else 0,
+                'true' if 'check_status' in props else 'false',
+                get('fault_level', 1), get('wake_function') or 'NULL'))
+        out.append("    },\n")
+    
+    # Inline cyclic output contexts
+    if cyclic_outputs:
+        out.append("    .cyclic_outputs = {\n")
+        for i, node in enumerate(cyclic_outputs):
+            get = node.properties.get
+            out.append(_CYCLIC_TPL % (
+                i, _OUTPUT_TYPES.get(get('output_type', 'can')),
+                get('target_id', 0), get('source_signal_id', 0),
+                get('period_us', 100000), get('deadline_offset_us', 0)))
+        out.append("    },\n")
+    
+    out.append("};\n\n")
+    
+    # Generate crosscheck context if enabled
+    if crosscheck_nodes:
+        crosscheck = crosscheck_nodes[0]  # Use first crosscheck node
+        out.append("/* Event crosscheck context (dual-channel safety) */\n")
+        out.append("static struct lq_crosscheck_ctx g_crosscheck_ctx;\n\n")
+    
+    # Generate ISR handlers for hardware inputs
+    for node in hw_inputs:
+        isr = _HW_ISR_KINDS.get(node.compatible)
+        if isr:
+            name, prefix, value_type = isr
+            out.append(_HW_ISR_TPL % (name, node.label, prefix, node.label, value_type,
+                                      node.properties.get('signal_id', 0)))
+    
+    # Generate weak stub implementations for fault wake functions
+    wake_functions = _wake_functions(fault_monitors)
+    if wake_functions:
+        out.append("/* Fault monitor wake callbacks - weak stubs (user can override) */\n")
+        for wake_fn in wake_functions:
+            out.append(f"__weak\n")
+            out.append(f"void {wake_fn}(uint8_t monitor_id, int32_t input_value, enum lq_fault_level fault_level) {{\n")
+            out.append(f"    /* Default: no action. Override this function to implement safety response. */\n")
+            out.append(f"    (void)monitor_id;\n")
+            out.append(f"    (void)input_value;\n")
+            out.append(f"    (void)fault_level;\n")
+            out.append(f"}}\n\n")
+    
+    # Generate init function
+    out.append(_INIT_HEAD)
+    
+    # Add crosscheck initialization if enabled
+    if crosscheck_nodes:
+        crosscheck = crosscheck_nodes[0].properties
+        out.append(_INIT_CROSSCHECK_TPL % (crosscheck.get('uart_id', 1),
+                                           crosscheck.get('timeout_ms', 50),
+                                           crosscheck.get('fail_gpio', 25)))
+    
+    out.append(_INIT_TAIL)
+    
+    # Generate output dispatch function
+    out.append(_DISPATCH_HEAD)
+    
+    # Add crosscheck send hook if enabled
+    if crosscheck_nodes:
+        out.append(_DISPATCH_CROSSCHECK)
+    
+    out.append(_DISPATCH_LOOP_HEAD)
+    
+    # Generate dispatch cases for each used output type
+    out.extend(case for output_type, case in _DISPATCH_CASES if output_type in output_types_used)
+    
+    out.append(_DISPATCH_TAIL)
+    
+    _write_if_changed(output_path, ''.join(out))
 
 
 def generate_hil_tests(nodes, output_path):
@@ -1191,260 +1340,205 @@ int main(void)
 }
 """
     
-    with open(output_path, 'w') as f:
-        f.write(template)
+    _write_if_changed(output_path, template)
+
+
+# HIL test DTS: file framing, one hil-test-* node, and one step@N of its sequence
+_HIL_HEAD = (
+    "/*\n"
+    " * AUTO-GENERATED HIL Tests\n"
+    " * Generated from system DTS\n"
+    " * DO NOT EDIT MANUALLY\n"
+    " */\n\n"
+    "/ {\n"
+)
+_HIL_TEST_HEAD = (
+    "    %s {\n"
+    "        compatible = \"lq,hil-test\";\n"
+    "        description = \"%s\";\n"
+    "        timeout-ms = <%s>;\n"
+    "        \n"
+    "        sequence {\n"
+)
+_HIL_TEST_TAIL = "        };\n    };\n\n"
+_HIL_STEP_TPL = (
+    "            step@%s {\n"
+    "                action = \"%s\";\n"
+    "%s"
+    "            };\n"
+)
+_HIL_CAN_DATA = "data = [0xE8 0x5E 0x00 0x00 0x00 0x00 0x00 0x00];"
 
+# generate_hil_tests_impl buckets, in order: compatible substrings that select each
+_HIL_BUCKET_KEYS = (
+    ('adc',),
+    ('can',),
+    ('merge', 'voter'),
+    ('fault-monitor',),
+    ('cyclic-output', 'can-output'),
+)
+
+@lru_cache(maxsize=None)
+def _hil_buckets(compatible):
+    """Indices of the _HIL_BUCKET_KEYS buckets a compatible belongs to"""
+    return tuple(i for i, keys in enumerate(_HIL_BUCKET_KEYS)
+                 if any(key in compatible for key in keys))
+
+def _hil_step(step, action, *props):
+    """One step@N node; props are its `name = value;` lines after the action"""
+    return _HIL_STEP_TPL % (step, action, ''.join(["                %s\n" % p for p in props]))
 
 def generate_hil_tests_impl(nodes, output_path):
     """Auto-generate HIL tests from system definition"""
     
-    # Collect all inputs
-    adc_sources = [n for n in nodes if 'adc' in n.compatible]
-    spi_sources = [n for n in nodes if 'spi' in n.compatible]
-    can_sources = [n for n in nodes if 'can' in n.compatible]
-    merge_nodes = [n for n in nodes if 'merge' in n.compatible or 'voter' in n.compatible]
-    fault_monitors = [n for n in nodes if 'fault-monitor' in n.compatible]
-    output_nodes = [n for n in nodes if 'cyclic-output' in n.compatible or 'can-output' in n.compatible]
-    
-    with open(output_path, 'w') as f:
-        f.write("/*\n")
-        f.write(" * AUTO-GENERATED HIL Tests\n")
-        f.write(" * Generated from system DTS\n")
-        f.write(" * DO NOT EDIT MANUALLY\n")
-        f.write(" */\n\n")
-        f.write("/ {\n")
-        
-        # Test 1: All inputs nominal
-        f.write("    hil-test-all-inputs-nominal {\n")
-        f.write("        compatible = \"lq,hil-test\";\n")
-        f.write("        description = \"All inputs at nominal values\";\n")
-        f.write("        timeout-ms = <2000>;\n")
-        f.write("        \n")
-        f.write("        sequence {\n")
+    # Collect all inputs (a node can land in several buckets)
+    buckets = adc_sources, can_sources, merge_nodes, fault_monitors, output_nodes = [], [], [], [], []
+    for node in nodes:
+        for i in _hil_buckets(node.compatible):
+            buckets[i].append(node)
+    
+    out = [_HIL_HEAD]
+    
+    # Test 1: All inputs nominal
+    out.append(_HIL_TEST_HEAD % ('hil-test-all-inputs-nominal', 'All inputs at nominal values', 2000))
+    
+    step = 0
+    # Inject all ADC inputs
+    for adc in adc_sources:
+        channel = adc.properties.get('channel', 0)
+        value = adc.properties.get('nominal-value', 2500)
+        out.append(_hil_step(step, 'inject-adc', f"channel = <{channel}>;", f"value = <{value}>;"))
+        step += 1
+    
+    # Inject all CAN inputs
+    for can in can_sources:
+        pgn = can.properties.get('pgn', 61444)
+        out.append(_hil_step(step, 'inject-can-pgn', f"pgn = <{pgn}>;", "priority = <3>;",
+                             "source-addr = <0x00>;", _HIL_CAN_DATA))
+        step += 1
+    
+    # Expect output based on actual output type
+    if output_nodes:
+        output = output_nodes[0]
+        output_type = output.properties.get('output_type', 'can')
+        
+        if output_type == 'gpio':
+            pin = output.properties.get('target_id', 0)
+            timeout = output.properties.get('expected_response_ms', 200)
+            # GPIO output - expect it to go high when signal is active
+            out.append(_hil_step(step, 'wait-gpio-high', f"pin = <{pin}>;", f"timeout-ms = <{timeout}>;"))
+        elif output_type == 'can' or output_type == 'canopen':
+            # For CANopen, use cob-id; for regular CAN, use pgn
+            if output_type == 'canopen':
+                can_id = output.properties.get('cob_id', 0x180)
+                timeout = output.properties.get('expected_response_ms', 1500)
+                out.append(_hil_step(step, 'expect-can', f"can-id = <{can_id}>;", f"timeout-ms = <{timeout}>;"))
+            else:
+                pgn = output.properties.get('pgn', 61444)
+                timeout = output.properties.get('expected_response_ms', 200)
+                out.append(_hil_step(step, 'expect-can', f"pgn = <{pgn}>;", f"timeout-ms = <{timeout}>;"))
+        elif output_type == 'pwm':
+            channel = output.properties.get('target_id', 0)
+            out.append(_hil_step(step, 'measure-pwm', f"channel = <{channel}>;", "timeout-ms = <200>;"))
+    
+    out.append(_HIL_TEST_TAIL)
+    
+    # Test 2: Voting/merge behavior
+    if merge_nodes:
+        merge = merge_nodes[0]
+        out.append(_HIL_TEST_HEAD % ('hil-test-voting-merge', 'Test voting/merge logic', 2000))
         
         step = 0
-        # Inject all ADC inputs
-        for adc in adc_sources:
-            channel = adc.properties.get('channel', 0)
-            value = adc.properties.get('nominal-value', 2500)
-            f.write(f"            step@{step} {{\n")
-            f.write(f"                action = \"inject-adc\";\n")
-            f.write(f"                channel = <{channel}>;\n")
-            f.write(f"                value = <{value}>;\n")
-            f.write(f"            }};\n")
-            step += 1
-        
-        # Inject all CAN inputs
-        for can in can_sources:
-            pgn = can.properties.get('pgn', 61444)
-            f.write(f"            step@{step} {{\n")
-            f.write(f"                action = \"inject-can-pgn\";\n")
-            f.write(f"                pgn = <{pgn}>;\n")
-            f.write(f"                priority = <3>;\n")
-            f.write(f"                source-addr = <0x00>;\n")
-            f.write(f"                data = [0xE8 0x5E 0x00 0x00 0x00 0x00 0x00 0x00];\n")
-            f.write(f"            }};\n")
+        # Inject slightly different values
+        for i, adc in enumerate(adc_sources[:3]):  # First 3 sensors
+            channel = adc.properties.get('channel', i)
+            value = 3000 + (i * 5)  # 3000, 3005, 3010
+            out.append(_hil_step(step, 'inject-adc', f"channel = <{channel}>;", f"value = <{value}>;"))
             step += 1
         
-        # Expect output based on actual output type
+        # Verify merged output based on actual output type
         if output_nodes:
             output = output_nodes[0]
             output_type = output.properties.get('output_type', 'can')
             
             if output_type == 'gpio':
                 pin = output.properties.get('target_id', 0)
-                timeout = output.properties.get('expected_response_ms', 200)
-                # GPIO output - expect it to go high when signal is active
-                f.write(f"            step@{step} {{\n")
-                f.write(f"                action = \"wait-gpio-high\";\n")
-                f.write(f"                pin = <{pin}>;\n")
-                f.write(f"                timeout-ms = <{timeout}>;\n")
-                f.write(f"            }};\n")
+                out.append(_hil_step(step, 'wait-gpio-high', f"pin = <{pin}>;", "timeout-ms = <500>;"))
             elif output_type == 'can' or output_type == 'canopen':
-                # For CANopen, use cob-id; for regular CAN, use pgn
                 if output_type == 'canopen':
                     can_id = output.properties.get('cob_id', 0x180)
-                    timeout = output.properties.get('expected_response_ms', 1500)
-                    f.write(f"            step@{step} {{\n")
-                    f.write(f"                action = \"expect-can\";\n")
-                    f.write(f"                can-id = <{can_id}>;\n")
-                    f.write(f"                timeout-ms = <{timeout}>;\n")
-                    f.write(f"            }};\n")
+                    out.append(_hil_step(step, 'expect-can', f"can-id = <{can_id}>;", "timeout-ms = <1500>;"))
                 else:
                     pgn = output.properties.get('pgn', 61444)
-                    timeout = output.properties.get('expected_response_ms', 200)
-                    f.write(f"            step@{step} {{\n")
-                    f.write(f"                action = \"expect-can\";\n")
-                    f.write(f"                pgn = <{pgn}>;\n")
-                    f.write(f"                timeout-ms = <{timeout}>;\n")
-                    f.write(f"            }};\n")
-            elif output_type == 'pwm':
-                channel = output.properties.get('target_id', 0)
-                f.write(f"            step@{step} {{\n")
-                f.write(f"                action = \"measure-pwm\";\n")
-                f.write(f"                channel = <{channel}>;\n")
-                f.write(f"                timeout-ms = <200>;\n")
-                f.write(f"            }};\n")
-        
-        f.write("        };\n")
-        f.write("    };\n\n")
-        
-        # Test 2: Voting/merge behavior
-        if merge_nodes:
-            merge = merge_nodes[0]
-            f.write("    hil-test-voting-merge {\n")
-            f.write("        compatible = \"lq,hil-test\";\n")
-            f.write("        description = \"Test voting/merge logic\";\n")
-            f.write("        timeout-ms = <2000>;\n")
-            f.write("        \n")
-            f.write("        sequence {\n")
-            
-            step = 0
-            # Inject slightly different values
-            for i, adc in enumerate(adc_sources[:3]):  # First 3 sensors
-                channel = adc.properties.get('channel', i)
-                value = 3000 + (i * 5)  # 3000, 3005, 3010
-                f.write(f"            step@{step} {{\n")
-                f.write(f"                action = \"inject-adc\";\n")
-                f.write(f"                channel = <{channel}>;\n")
-                f.write(f"                value = <{value}>;\n")
-                f.write(f"            }};\n")
-                step += 1
-            
-            # Verify merged output based on actual output type
-            if output_nodes:
-                output = output_nodes[0]
-                output_type = output.properties.get('output_type', 'can')
-                
-                if output_type == 'gpio':
-                    pin = output.properties.get('target_id', 0)
-                    f.write(f"            step@{step} {{\n")
-                    f.write(f"                action = \"wait-gpio-high\";\n")
-                    f.write(f"                pin = <{pin}>;\n")
-                    f.write(f"                timeout-ms = <500>;\n")
-                    f.write(f"            }};\n")
-                elif output_type == 'can' or output_type == 'canopen':
-                    if output_type == 'canopen':
-                        can_id = output.properties.get('cob_id', 0x180)
-                        f.write(f"            step@{step} {{\n")
-                        f.write(f"                action = \"expect-can\";\n")
-                        f.write(f"                can-id = <{can_id}>;\n")
-                        f.write(f"                timeout-ms = <1500>;\n")
-                        f.write(f"            }};\n")
-                    else:
-                        pgn = output.properties.get('pgn', 61444)
-                        f.write(f"            step@{step} {{\n")
-                        f.write(f"                action = \"expect-can\";\n")
-                        f.write(f"                pgn = <{pgn}>;\n")
-                        f.write(f"                timeout-ms = <200>;\n")
-                        f.write(f"            }};\n")
-            
-            f.write("        };\n")
-            f.write("    };\n\n")
-        
-        # Test 3: Fault condition triggering
-        if fault_monitors and adc_sources and output_nodes:
-            fault = fault_monitors[0]
-            adc = adc_sources[0]
-            output = output_nodes[0]
-            channel = adc.properties.get('channel', 0)
-            output_type = output.properties.get('output_type', 'can')
-            
-            # Get fault threshold and response time from monitor
-            max_value = fault.properties.get('max_value', 5000)
-            fault_timeout = fault.properties.get('expected_response_ms', 50)
-            fault_test_value = max_value + 1000  # Above threshold
-            
-            f.write("    hil-test-fault-trigger {\n")
-            f.write("        compatible = \"lq,hil-test\";\n")
-            f.write("        description = \"Test fault detection triggers output\";\n")
-            f.write("        timeout-ms = <2000>;\n")
-            f.write("        \n")
-            f.write("        sequence {\n")
-            f.write("            step@0 {\n")
-            f.write("                action = \"inject-adc\";\n")
-            f.write(f"                channel = <{channel}>;\n")
-            f.write(f"                value = <{fault_test_value}>;  /* Above max threshold */\n")
-            f.write("            };\n")
-            
-            if output_type == 'gpio':
-                pin = output.properties.get('target_id', 0)
-                f.write("            step@1 {\n")
-                f.write("                action = \"wait-gpio-high\";\n")
-                f.write(f"                pin = <{pin}>;\n")
-                f.write(f"                timeout-ms = <{fault_timeout}>;\n")
-                f.write("            };\n")
-            elif output_type == 'can' or output_type == 'canopen':
-                # For CANopen faults, still check for DM1
-                f.write("            step@1 {\n")
-                f.write("                action = \"expect-can\";\n")
-                f.write("                pgn = <65226>;  /* DM1 diagnostic message */\n")
-                f.write(f"                timeout-ms = <{fault_timeout}>;\n")
-                f.write("            };\n")
-            
-            f.write("        };\n")
-            f.write("    };\n\n")
-            
-            # Test 4: Normal condition (no fault)
-            min_value = fault.properties.get('min_value', 0)
-            normal_value = (min_value + max_value) // 2  # Mid-range
-            
-            f.write("    hil-test-normal-operation {\n")
-            f.write("        compatible = \"lq,hil-test\";\n")
-            f.write("        description = \"Test normal operation without faults\";\n")
-            f.write("        timeout-ms = <2000>;\n")
-            f.write("        \n")
-            f.write("        sequence {\n")
-            f.write("            step@0 {\n")
-            f.write("                action = \"inject-adc\";\n")
-            f.write(f"                channel = <{channel}>;\n")
-            f.write(f"                value = <{normal_value}>;  /* Within normal range */\n")
-            f.write("            };\n")
-            
-            if output_type == 'gpio':
-                pin = output.properties.get('target_id', 0)
-                timeout = output.properties.get('expected_response_ms', 200)
-                f.write("            step@1 {\n")
-                f.write("                action = \"wait-gpio-low\";\n")
-                f.write(f"                pin = <{pin}>;\n")
-                f.write(f"                timeout-ms = <{timeout}>;\n")
-                f.write("            };\n")
-            elif output_type == 'can' or output_type == 'canopen':
-                timeout = output.properties.get('expected_response_ms', 1500 if output_type == 'canopen' else 200)
-                if output_type == 'canopen':
-                    can_id = output.properties.get('cob_id', 0x180)
-                    f.write("            step@1 {\n")
-                    f.write("                action = \"expect-can\";\n")
-                    f.write(f"                can-id = <{can_id}>;\n")
-                    f.write(f"                timeout-ms = <{timeout}>;\n")
-                    f.write("            };\n")
-                else:
-                    pgn = output.properties.get('pgn', 61444)
-                    f.write("            step@1 {\n")
-                    f.write("                action = \"expect-can\";\n")
-                    f.write(f"                pgn = <{pgn}>;\n")
-                    f.write(f"                timeout-ms = <{timeout}>;\n")
-                    f.write("            };\n")
-            
-            f.write("        };\n")
-            f.write("    };\n\n")
-        
-        # Test 5: Latency test
-        if adc_sources and output_nodes:
-            f.write("    hil-test-latency {\n")
-            f.write("        compatible = \"lq,hil-test\";\n")
-            f.write("        description = \"End-to-end latency\";\n")
-            f.write("        timeout-ms = <1000>;\n")
-            f.write("        \n")
-            f.write("        sequence {\n")
-            f.write("            step@0 {\n")
-            f.write("                action = \"measure-latency\";\n")
-            f.write("                max-latency-us = <50000>;  /* 50ms */\n")
-            f.write("            };\n")
-            f.write("        };\n")
-            f.write("    };\n\n")
-        
-        f.write("};\n")
+                    out.append(_hil_step(step, 'expect-can', f"pgn = <{pgn}>;", "timeout-ms = <200>;"))
+        
+        out.append(_HIL_TEST_TAIL)
+    
+    # Test 3: Fault condition triggering
+    if fault_monitors and adc_sources and output_nodes:
+        fault = fault_monitors[0]
+        adc = adc_sources[0]
+        output = output_nodes[0]
+        channel = adc.properties.get('channel', 0)
+        output_type = output.properties.get('output_type', 'can')
+        
+        # Get fault threshold and response time from monitor
+        max_value = fault.properties.get('max_value', 5000)
+        fault_timeout = fault.properties.get('expected_response_ms', 50)
+        fault_test_value = max_value + 1000  # Above threshold
+        
+        out.append(_HIL_TEST_HEAD % ('hil-test-fault-trigger', 'Test fault detection triggers output', 2000))
+        out.append(_hil_step(0, 'inject-adc', f"channel = <{channel}>;",
+                             f"value = <{fault_test_value}>;  /* Above max threshold */"))
+        
+        if output_type == 'gpio':
+            pin = output.properties.get('target_id', 0)
+            out.append(_hil_step(1, 'wait-gpio-high', f"pin = <{pin}>;", f"timeout-ms = <{fault_timeout}>;"))
+        elif output_type == 'can' or output_type == 'canopen':
+            # For CANopen faults, still check for DM1
+            out.append(_hil_step(1, 'expect-can', "pgn = <65226>;  /* DM1 diagnostic message */",
+                                 f"timeout-ms = <{fault_timeout}>;"))
+        
+        out.append(_HIL_TEST_TAIL)
+        
+        # Test 4: Normal condition (no fault)
+        min_value = fault.properties.get('min_value', 0)
+        normal_value = (min_value + max_value) // 2  # Mid-range
+        
+        out.append(_HIL_TEST_HEAD % ('hil-test-normal-operation', 'Test normal operation without faults', 2000))
+        out.append(_hil_step(0, 'inject-adc', f"channel = <{channel}>;",
+                             f"value = <{normal_value}>;  /* Within normal range */"))
+        
+        if output_type == 'gpio':
+            pin = output.properties.get('target_id', 0)
+            timeout = output.properties.get('expected_response_ms', 200)
+            out.append(_hil_step(1, 'wait-gpio-low', f"pin = <{pin}>;", f"timeout-ms = <{timeout}>;"))
+        elif output_type == 'can' or output_type == 'canopen':
+            timeout = output.properties.get('expected_response_ms', 1500 if output_type == 'canopen' else 200)
+            if output_type == 'canopen':
+                can_id = output.properties.get('cob_id', 0x180)
+                out.append(_hil_step(1, 'expect-can', f"can-id = <{can_id}>;", f"timeout-ms = <{timeout}>;"))
+            else:
+                pgn = output.properties.get('pgn', 61444)
+                out.append(_hil_step(1, 'expect-can', f"pgn = <{pgn}>;", f"timeout-ms = <{timeout}>;"))
+        
+        out.append(_HIL_TEST_TAIL)
+    
+    # Test 5: Latency test
+    if adc_sources and output_nodes:
+        out.append(_HIL_TEST_HEAD % ('hil-test-latency', 'End-to-end latency', 1000))
+        out.append(_hil_step(0, 'measure-latency', "max-latency-us = <50000>;  /* 50ms */"))
+        out.append(_HIL_TEST_TAIL)
+    
+    out.append("};\n")
+    
+    _write_if_changed(output_path, ''.join(out))
+
+@lru_cache(maxsize=None)
+def _platform_adaptor(platform):
+    """Platform adaptor and its (input-free) header text, built once per platform"""
+    adaptor = get_platform_adaptor(platform)
+    return adaptor, adaptor.generate_platform_header()
 
 def generate_platform_hw(nodes, output_path, platform):
     """Generate platform-specific hardware interface"""
@@ -1453,7 +1547,7 @@ def generate_platform_hw(nodes, output_path, platform):
         return
     
     try:
-        adaptor = get_platform_adaptor(platform)
+        adaptor, platform_header = _platform_adaptor(platform)
     except ValueError as e:
         print(f"Error: {e}")
         return
@@ -1461,8 +1555,8 @@ def generate_platform_hw(nodes, output_path, platform):
     # Collect hardware input nodes
     hw_inputs = [n for n in nodes if n.compatible.startswith('lq,hw-')]
     
-    with open(output_path, 'w') as f:
-        f.write(f"""/*
+    out = []
+    out.append(f"""/*
  * AUTO-GENERATED PLATFORM-SPECIFIC CODE
  * Platform: {adaptor.platform_name}
  * Generated from devicetree by scripts/dts_gen.py
@@ -1472,29 +1566,31 @@ def generate_platform_hw(nodes, output_path, platform):
  */
 
 """)
-        
-        # Platform headers
-        f.write(adaptor.generate_platform_header())
-        f.write("\n")
-        
-        # Generate ISR wrappers for each hardware input
-        f.write("/* ========================================\n")
-        f.write(" * Interrupt Service Routines\n")
-        f.write(" * ======================================== */\n\n")
-        
-        for node in hw_inputs:
-            signal_id = node.properties.get('signal_id', 0)
-            isr_code = adaptor.generate_isr_wrapper(node, signal_id)
-            if isr_code:
-                f.write(isr_code)
-                f.write("\n")
-        
-        # Generate peripheral initialization
-        f.write("/* ========================================\n")
-        f.write(" * Peripheral Initialization\n")
-        f.write(" * ======================================== */\n\n")
-        
-        f.write(adaptor.generate_peripheral_init(hw_inputs))
+    
+    # Platform headers
+    out.append(platform_header)
+    out.append("\n")
+    
+    # Generate ISR wrappers for each hardware input
+    out.append("/* ========================================\n")
+    out.append(" * Interrupt Service Routines\n")
+    out.append(" * ======================================== */\n\n")
+    
+    for node in hw_inputs:
+        signal_id = node.properties.get('signal_id', 0)
+        isr_code = adaptor.generate_isr_wrapper(node, signal_id)
+        if isr_code:
+            out.append(isr_code)
+            out.append("\n")
+    
+    # Generate peripheral initialization
+    out.append("/* ========================================\n")
+    out.append(" * Peripheral Initialization\n")
+    out.append(" * ======================================== */\n\n")
+    
+    out.append(adaptor.generate_peripheral_init(hw_inputs))
+    
+    _write_if_changed(output_path, ''.join(out))
     
     print(f"Generated {output_path} for {adaptor.platform_name}")
 
@@ -1507,25 +1603,22 @@ def expand_eds_references(input_dts_path, output_dts_path, signals_header_path=N
     sys.path.insert(0, str(Path(__file__).parent))
     
     # Read the input DTS
-    with open(input_dts_path, 'r') as f:
-        dts_content = f.read()
+    dts_content = Path(input_dts_path).read_text()
     
     # Find canopen nodes with eds property
     # Pattern: label: canopen-device@N { ... eds = "file.eds"; ... }
-    canopen_pattern = r'(\w+):\s*(canopen-device@\d+)\s*\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
-    
     expanded_content = dts_content
     all_tpdos = []
     all_rpdos = []
     
-    for match in re.finditer(canopen_pattern, dts_content):
-        label = match.group(1)
-        node_decl = match.group(2)
-        node_content = match.group(3)
-        full_node = match.group(0)
+    for head, body_end in _scan_blocks(dts_content, _CANOPEN_HEAD_RE):
+        label = head.group(1)
+        node_decl = head.group(2)
+        node_content = dts_content[head.end():body_end]
+        full_node = dts_content[head.start():body_end + 1]
         
         # Check if this node has an 'eds' property
-        eds_match = re.search(r'eds\s*=\s*"([^"]+)"', node_content)
+        eds_match = _EDS_PROP_RE.search(node_content)
         if not eds_match:
             continue
         
@@ -1540,7 +1633,7 @@ def expand_eds_references(input_dts_path, output_dts_path, signals_header_path=N
             continue
         
         # Extract node-id override if present
-        node_id_match = re.search(r'node-id\s*=\s*<(\d+)>', node_content)
+        node_id_match = _NODE_ID_PROP_RE.search(node_content)
         node_id = int(node_id_match.group(1)) if node_id_match else None
         
         try:
@@ -1580,8 +1673,7 @@ def expand_eds_references(input_dts_path, output_dts_path, signals_header_path=N
             continue
     
     # Write expanded DTS
-    with open(output_dts_path, 'w') as f:
-        f.write(expanded_content)
+    _write_if_changed(output_dts_path, expanded_content)
     
     # Generate signal header if requested
     if signals_header_path and (all_tpdos or all_rpdos):
@@ -1675,16 +1767,15 @@ def generate_canopen_signal_header(tpdos, rpdos, output_path):
     
     lines.append("#endif /* MOTOR_SIGNALS_H */")
     
-    with open(output_path, 'w') as f:
-        f.write('\n'.join(lines))
+    _write_if_changed(output_path, '\n'.join(lines))
 
 def main():
     """Main entry point"""
     import argparse
     
     parser = argparse.ArgumentParser(description='Generate C code from devicetree')
-    parser.add_argument('input_dts', help='Input devicetree file')
-    parser.add_argument('output_dir', help='Output directory')
+    parser.add_argument('input_dts', type=Path, help='Input devicetree file')
+    parser.add_argument('output_dir', type=Path, help='Output directory')
     parser.add_argument('--platform', help='Platform (stm32, samd, esp32, nrf52, zephyr, freertos, baremetal)')
     parser.add_argument('--expand-eds', action='store_true', help='Expand EDS references in DTS')
     parser.add_argument('--signals-header', help='Output path for signal ID header file')
@@ -1692,8 +1783,8 @@ def main():
     args = parser.parse_args()
     platform = args.platform
     
-    input_dts = Path(args.input_dts)
-    output_dir = Path(args.output_dir)
+    input_dts = args.input_dts
+    output_dir = args.output_dir
     output_dir.mkdir(parents=True, exist_ok=True)
     
     if not input_dts.exists():
@@ -1709,11 +1800,12 @@ def main():
             print(f"Generated {args.signals_header}")
         return
     
-    # Parse DTS
-    with open(input_dts, 'r') as f:
-        dts_content = f.read()
+    # One whole-file read: read_text() sizes its buffer from the file itself
+    dts_content = input_dts.read_text()
     
+    # Parse DTS (the raw text is not kept around once the nodes exist)
     nodes = simple_dts_parser(dts_content)
+    del dts_content
     
     # Resolve phandle references and auto-assign signal IDs
     nodes = resolve_phandles_and_assign_ids(nodes)
@@ -24,6 +24,12 @@ from pathlib import Path
 from typing import List, Dict, Any
 import json
 
+# Labelled nodes with a compatible, up to their first closing brace
+_NODE_RE = re.compile(r'(\w+):\s*[\w-]+@?\d*\s*\{[^}]*compatible\s*=\s*"([^"]+)"[^}]*\}', re.DOTALL)
+_INT_PROP_RE = re.compile(r'([\w-]+)\s*=\s*<(\d+)>')
+_STR_PROP_RE = re.compile(r'([\w-]+)\s*=\s*"([^"]+)"')
+_PHANDLE_RE = re.compile(r'<&(\w+)>')
+
 class DTSNode:
     def __init__(self, name: str, compatible: str):
         self.name = name
@@ -49,8 +55,7 @@ class ComprehensiveTestGenerator:
             content = f.read()
         
         # Find all nodes with compatibles
-        pattern = r'(\w+):\s*[\w-]+@?\d*\s*\{[^}]*compatible\s*=\s*"([^"]+)"[^}]*\}'
-        matches = re.finditer(pattern, content, re.DOTALL)
+        matches = _NODE_RE.finditer(content)
         
         for match in matches:
             name = match.group(1)
@@ -84,15 +89,15 @@ class ComprehensiveTestGenerator:
     def _parse_properties(self, block: str, node: DTSNode):
         """Extract properties from DTS block"""
         # Numeric properties
-        for prop_match in re.finditer(r'([\w-]+)\s*=\s*<(\d+)>', block):
+        for prop_match in _INT_PROP_RE.finditer(block):
             node.properties[prop_match.group(1)] = int(prop_match.group(2))
         
         # String properties  
-        for prop_match in re.finditer(r'([\w-]+)\s*=\s*"([^"]+)"', block):
+        for prop_match in _STR_PROP_RE.finditer(block):
             node.properties[prop_match.group(1)] = prop_match.group(2)
         
         # Phandle references
-        phandle_match = re.search(r'<&(\w+)>', block)
+        phandle_match = _PHANDLE_RE.search(block)
         if phandle_match:
             node.properties['source_ref'] = phandle_match.group(1)
     
@@ -21,6 +21,15 @@ import sys
 import re
 from pathlib import Path
 
+# hil-test-* node headers and the properties read from each test block
+_TEST_RE = re.compile(r'(hil-test-[\w-]+)\s*\{')
+_DESCRIPTION_RE = re.compile(r'description\s*=\s*"([^"]+)"')
+_TIMEOUT_RE = re.compile(r'timeout-ms\s*=\s*<(\d+)>')
+_STEP_RE = re.compile(r'step@(\d+)\s*\{')
+_ACTION_RE = re.compile(r'action\s*=\s*"([^"]+)"')
+# name = <value> | "string" | [array]
+_STEP_PROP_RE = re.compile(r'([\w-]+)\s*=\s*(?:<([^>]+)>|"([^"]+)"|(\[[\s\w]+\]))')
+
 class TestStep:
     def __init__(self, step_num):
         self.step_num = step_num
@@ -39,8 +48,7 @@ def parse_test_dts(dts_content):
     tests = []
     
     # Find all hil-test-* nodes
-    test_pattern = r'(hil-test-[\w-]+)\s*\{'
-    matches = re.finditer(test_pattern, dts_content)
+    matches = _TEST_RE.finditer(dts_content)
     
     for match in matches:
         test_name = match.group(1)
@@ -63,12 +71,12 @@ def parse_test_dts(dts_content):
         test_block = dts_content[start:end]
         
         # Parse description
-        desc_match = re.search(r'description\s*=\s*"([^"]+)"', test_block)
+        desc_match = _DESCRIPTION_RE.search(test_block)
         if desc_match:
             test.description = desc_match.group(1)
         
         # Parse timeout
-        timeout_match = re.search(r'timeout-ms\s*=\s*<(\d+)>', test_block)
+        timeout_match = _TIMEOUT_RE.search(test_block)
         if timeout_match:
             test.timeout_ms = int(timeout_match.group(1))
         
@@ -95,8 +103,7 @@ def parse_test_dts(dts_content):
         
         if sequence_block:
             # Find all step@N nodes
-            step_pattern = r'step@(\d+)\s*\{'
-            step_matches = list(re.finditer(step_pattern, sequence_block))
+            step_matches = list(_STEP_RE.finditer(sequence_block))
             
             for i, step_match in enumerate(step_matches):
                 step_num = int(step_match.group(1))
@@ -123,13 +130,12 @@ def parse_test_dts(dts_content):
                 step = TestStep(step_num)
                 
                 # Parse action
-                action_match = re.search(r'action\s*=\s*"([^"]+)"', step_content)
+                action_match = _ACTION_RE.search(step_content)
                 if action_match:
                     step.action = action_match.group(1)
                 
                 # Parse all properties
-                prop_pattern = r'([\w-]+)\s*=\s*(?:<([^>]+)>|"([^"]+)"|(\[[\s\w]+\]))'
-                for prop_match in re.finditer(prop_pattern, step_content):
+                for prop_match in _STEP_PROP_RE.finditer(step_content):
                     prop_name = prop_match.group(1)
                     if prop_match.group(2):  # <value>
                         step.properties[prop_name] = prop_match.group(2).strip()
@@ -200,35 +200,25 @@ class RequirementGenerator:
 
     def _detect_conflicts(self):
         """Run all conflict detection checks"""
+        handler = self.conflict_handler
+        # Build the handler-side objects once so every check shares them
+        hlr_objects = [self._hlr_to_object(hlr) for hlr in self.hlrs]
+        llr_objects = [self._llr_to_object(llr) for llr in self.llrs]
+
         # Resource conflicts
-        resource_conflicts = self.conflict_handler.check_resource_conflict(
-            [self._llr_to_object(llr) for llr in self.llrs]
-        )
-        for conflict in resource_conflicts:
-            self.conflict_handler.add_conflict(conflict)
+        handler.add_conflicts(handler.check_resource_conflict(llr_objects))
 
         # Timing conflicts
-        timing_conflicts = self.conflict_handler.check_timing_conflict(
-            [self._hlr_to_object(hlr) for hlr in self.hlrs],
-            [self._llr_to_object(llr) for llr in self.llrs]
-        )
-        for conflict in timing_conflicts:
-            self.conflict_handler.add_conflict(conflict)
+        handler.add_conflicts(handler.check_timing_conflict(hlr_objects, llr_objects))
 
         # Dependency conflicts
-        dep_conflicts = self.conflict_handler.check_dependency_conflict(
-            [self._llr_to_object(llr) for llr in self.llrs]
-        )
-        for conflict in dep_conflicts:
-            self.conflict_handler.add_conflict(conflict)
+        handler.add_conflicts(handler.check_dependency_conflict(llr_objects))
 
         # Budget conflicts (example limits)
-        budget_conflicts = self.conflict_handler.check_budget_conflict(
-            [self._llr_to_object(llr) for llr in self.llrs],
+        handler.add_conflicts(handler.check_budget_conflict(
+            llr_objects,
             limits={'signals': 32, 'cyclic_outputs': 16, 'merges': 8}
-        )
-        for conflict in budget_conflicts:
-            self.conflict_handler.add_conflict(conflict)
+        ))
 
     def _generate_dts_content(self) -> str:
         """Generate complete DTS file content"""